@@ -0,0 +1,122 @@
+"""
+Event loop responsiveness while a Sheets call is in flight.
+
+Starts a local HTTP server (in its own thread) that mimics `values:batchGet`
+with a fixed delay, then runs a number of simulated chats - each one awaits
+a short sleep in a loop, like a handler waiting on Redis - while a Sheets read
+is in flight on the bot loop.
+
+`blocking` issues the read the way `GoogleSheetsApiService` does: a synchronous
+HTTP call from inside a coroutine. `aiohttp` goes through `AsyncGoogleSheetsApiService`.
+
+Usage: python benchmarks/sheets_event_loop.py [--delay 0.5] [--chats 50] [--tick 0.005]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'tgbot'))
+
+from services.google_sheets_async_api_service import AsyncGoogleSheetsApiService  # noqa: E402
+
+SPREADSHEET_ID = 'bench'
+RANGES = [('Пользователи бота', 'A2:E'), ('Виды работ', 'A2:A'), ('Клиенты', 'A2:B')]
+
+
+class StaticTokenProvider:
+    async def get_token(self, session) -> str:
+        return 'bench-token'
+
+
+def start_fake_sheets(delay: float) -> str:
+    started = threading.Event()
+    address = {}
+
+    async def batch_get(request: web.Request) -> web.Response:
+        await asyncio.sleep(delay)
+        ranges = request.query.getall('ranges', [])
+        return web.json_response({
+            'valueRanges': [{'range': r, 'values': [['a', 'b'], ['c', 'd']]} for r in ranges],
+        })
+
+    async def serve():
+        app = web.Application()
+        app.router.add_get('/v4/spreadsheets/{spreadsheet_id}/values:batchGet', batch_get)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        address['port'] = runner.addresses[0][1]
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    started.wait()
+    return f'http://127.0.0.1:{address["port"]}/v4/spreadsheets'
+
+
+async def chat(stop: asyncio.Event, latencies: list[float], tick: float) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(tick)
+        latencies.append(time.perf_counter() - started - tick)
+
+
+async def run_scenario(name: str, sheets_call, chats: int, tick: float) -> None:
+    stop = asyncio.Event()
+    latencies: list[float] = []
+    tasks = [asyncio.create_task(chat(stop, latencies, tick)) for _ in range(chats)]
+    await asyncio.sleep(tick * 4)
+    latencies.clear()
+    started = time.perf_counter()
+    await sheets_call()
+    call_time = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*tasks)
+    print(
+        f'{name:<9} sheets call {call_time * 1000:7.1f} ms | '
+        f'chat ticks served {len(latencies):6d} | '
+        f'lag p50 {statistics.median(latencies) * 1000:7.2f} ms | '
+        f'lag max {max(latencies) * 1000:7.2f} ms'
+    )
+
+
+async def main(delay: float, chats: int, tick: float) -> None:
+    api_url = start_fake_sheets(delay)
+    service = AsyncGoogleSheetsApiService(
+        creds_file='',
+        scopes=[],
+        api_url=api_url,
+        token_provider=StaticTokenProvider(),
+    )
+    query = '&'.join('ranges=' + urllib.parse.quote(k + '!' + v) for k, v in RANGES)
+
+    async def blocking_call():
+        with urllib.request.urlopen(f'{api_url}/{SPREADSHEET_ID}/values:batchGet?{query}') as resp:
+            resp.read()
+
+    async def async_call():
+        await service.get_ranges(SPREADSHEET_ID, RANGES)
+
+    try:
+        await run_scenario('blocking', blocking_call, chats, tick)
+        await run_scenario('aiohttp', async_call, chats, tick)
+    finally:
+        await service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--delay', type=float, default=0.5, help='simulated Sheets latency, s')
+    parser.add_argument('--chats', type=int, default=50, help='concurrent chats')
+    parser.add_argument('--tick', type=float, default=0.005, help='chat handler await, s')
+    args = parser.parse_args()
+    asyncio.run(main(args.delay, args.chats, args.tick))
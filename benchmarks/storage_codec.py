@@ -0,0 +1,87 @@
+"""
+Storage codecs on a cached work time report list.
+
+Builds a list of `WorkTimeReport` dicts like the one `update_work_time_report_data`
+caches per user and compares encode/decode time and value size for every codec,
+with and without compression. With --redis-url the values are also written to
+Redis and `MEMORY USAGE` is reported (the keys are deleted afterwards).
+
+Usage: python benchmarks/storage_codec.py [--reports 3000] [--threshold 1024] [--redis-url redis://localhost:6379/15]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from redis.asyncio import Redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'tgbot'))
+
+from models import WorkTimeReport  # noqa: E402
+from services.codecs import CodecKind, StorageCodec  # noqa: E402
+
+KEY = 'work_time_report'
+
+
+def make_payload(reports: int) -> dict:
+    rnd = random.Random(1)
+    return {KEY: [
+        WorkTimeReport(
+            report_date=f'{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.2024',
+            user_id=str(1000 + rnd.randrange(30)),
+            user_fullname=f'Сотрудник {rnd.randrange(30)}',
+            user_job_title=f'Должность {rnd.randrange(5)}',
+            work_type=f'Вид работы {rnd.randrange(15)}',
+            client=f'Клиент {rnd.randrange(200):04d}',
+            hours=f'{rnd.randrange(4):02d}:{rnd.choice([0, 15, 30, 45]):02d}',
+            comment=rnd.choice(['-', 'Подготовка документов', 'Консультация по договору']),
+            row_id=i + 2,
+        ).dict()
+        for i in range(reports)
+    ]}
+
+
+def timed(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+async def main(reports: int, threshold: int, repeat: int, redis_url: str | None) -> None:
+    payload = make_payload(reports)
+    redis = Redis.from_url(redis_url) if redis_url else None
+    print(f'{reports} reports')
+    try:
+        for kind in CodecKind:
+            for compress_threshold in (0, threshold):
+                codec = StorageCodec(kind=kind, compress_threshold=compress_threshold)
+                value = codec.encode(payload)
+                assert codec.decode(value) == payload
+                name = f'{kind}{"+zlib" if compress_threshold else ""}'
+                line = (
+                    f'{name:<13} size {len(value) / 1024:8.1f} KiB | '
+                    f'encode {timed(lambda: codec.encode(payload), repeat) * 1000:7.2f} ms | '
+                    f'decode {timed(lambda: codec.decode(value), repeat) * 1000:7.2f} ms'
+                )
+                if redis is not None:
+                    key = f'bench:storage_codec:{name}'
+                    await redis.set(key, value)
+                    line += f' | redis {await redis.memory_usage(key) / 1024:8.1f} KiB'
+                    await redis.delete(key)
+                print(line)
+    finally:
+        if redis is not None:
+            await redis.aclose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, default=3000, help='reports in the cached list')
+    parser.add_argument('--threshold', type=int, default=1024, help='compression threshold, bytes')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per measurement')
+    parser.add_argument('--redis-url', help='also measure MEMORY USAGE in this Redis')
+    args = parser.parse_args()
+    asyncio.run(main(args.reports, args.threshold, args.repeat, args.redis_url))
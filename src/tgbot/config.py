@@ -2,6 +2,8 @@ from configparser import ConfigParser
 from dataclasses import dataclass
 from enum import StrEnum
 
+from services.codecs import CodecKind
+
 
 @dataclass
 class GoogleRepositoryConfig:
@@ -25,6 +27,23 @@ class GoogleRepositoryConfig:
     wtrs_time_plan_cell: str
     wtrs_time_fact_cell: str
     wtrs_time_net_cell: str
+    # per handbook TTLs, handbook_expire_seconds if not set
+    users_expire_seconds: int | None = None
+    work_types_expire_seconds: int | None = None
+    clients_expire_seconds: int | None = None
+    work_time_report_source: 'WorkTimeReportSource' = 'sheet'
+    work_time_report_mirror_expire_seconds: int = 300
+
+
+class WorkTimeReportSource(StrEnum):
+    sheet = 'sheet'
+    local = 'local'
+
+
+class GoogleSheetsTransport(StrEnum):
+    aiohttp = 'aiohttp'
+    executor = 'executor'
+    fake = 'fake'
 
 
 @dataclass
@@ -34,11 +53,65 @@ class GoogleSheetsConfig:
     version: str
     creds_file: str
     scopes: str
+    api_url: str = 'https://sheets.googleapis.com/v4/spreadsheets'
+    request_timeout: float = 30
+    discovery_file: str | None = None
+    transport: GoogleSheetsTransport = GoogleSheetsTransport.aiohttp
+    executor_pool_size: int = 4
+    executor_call_timeout: float = 120
+    coalesce_reads: bool = True
+    coalesce_lease_ms: int = 30000
+    read_quota_per_minute: int = 60
+    write_quota_per_minute: int = 60
+    retry_max_attempts: int = 4
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 8
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30
+
+
+@dataclass
+class HandbookRefresherConfig:
+    enabled: bool = True
+    interval: float = 0
+    retry_delay: float = 5
+
+
+@dataclass
+class ReportMirrorSyncConfig:
+    enabled: bool = True
+    interval: float = 10
+    full_interval: float = 3600
+
+
+@dataclass
+class FakeSheetsConfig:
+    latency: str = 'lognormal:150,0.5'
+    read_quota_per_minute: int = 0
+    write_quota_per_minute: int = 0
+    quota_error_rate: float = 0
+    outage_rate: float = 0
+    outage_seconds: float = 30
+    work_day_hours: float = 8
+    seed: int | None = None
+    users: int = 30
+    work_types: int = 15
+    clients: int = 200
+    reports: int = 5000
+
+
+@dataclass
+class ReportOutboxConfig:
+    flush_window: float = 2
+    batch_size: int = 200
+    lease_seconds: int = 30
 
 
 @dataclass
 class RedisConfig:
     url: str
+    codec: CodecKind = CodecKind.json
+    compress_threshold: int = 0
 
 
 class LoggerLevel(StrEnum):
@@ -49,11 +122,15 @@ class LoggerLevel(StrEnum):
 @dataclass
 class LoggerConfig:
     level: LoggerLevel = LoggerLevel.info
+    stats_interval: int = 0
 
 
 @dataclass
 class TgBotConfig:
     token: str
+    session_ttl: float = 30
+    callback_dedupe_ms: int = 1000
+    scenario_ttl: int = 86400
 
 
 @dataclass
@@ -63,6 +140,10 @@ class Config:
     redis: RedisConfig
     google_sheets: GoogleSheetsConfig
     google_repository: GoogleRepositoryConfig
+    report_outbox: ReportOutboxConfig
+    fake_sheets: FakeSheetsConfig
+    handbook_refresher: HandbookRefresherConfig
+    report_mirror_sync: ReportMirrorSyncConfig
 
 
 def load_config(path: str):
@@ -74,16 +155,34 @@ def load_config(path: str):
     redis_conf = config['redis']
     google_sheets_conf = config['google_sheets']
     google_repository_conf = config['google_repository']
+    if not config.has_section('report_outbox'):
+        config.add_section('report_outbox')
+    report_outbox_conf = config['report_outbox']
+    if not config.has_section('fake_sheets'):
+        config.add_section('fake_sheets')
+    fake_sheets_conf = config['fake_sheets']
+    if not config.has_section('handbook_refresher'):
+        config.add_section('handbook_refresher')
+    handbook_refresher_conf = config['handbook_refresher']
+    if not config.has_section('report_mirror_sync'):
+        config.add_section('report_mirror_sync')
+    report_mirror_sync_conf = config['report_mirror_sync']
 
     return Config(
         logger=LoggerConfig(
             level=logger_conf.get('level'),
+            stats_interval=logger_conf.getint('stats_interval', fallback=0),
         ),
         tgbot=TgBotConfig(
             token=tgbot_conf.get('token'),
+            session_ttl=tgbot_conf.getfloat('session_ttl', fallback=30),
+            callback_dedupe_ms=tgbot_conf.getint('callback_dedupe_ms', fallback=1000),
+            scenario_ttl=tgbot_conf.getint('scenario_ttl', fallback=86400),
         ),
         redis=RedisConfig(
             url=redis_conf.get('url'),
+            codec=CodecKind(redis_conf.get('codec', fallback=CodecKind.json)),
+            compress_threshold=redis_conf.getint('compress_threshold', fallback=0),
         ),
         google_sheets=GoogleSheetsConfig(
             discovery_url=google_sheets_conf.get('discovery_url'),
@@ -91,12 +190,29 @@ def load_config(path: str):
             version=google_sheets_conf.get('version'),
             creds_file=google_sheets_conf.get('creds_file'),
             scopes=google_sheets_conf.get('scopes'),
+            api_url=google_sheets_conf.get(
+                'api_url', fallback='https://sheets.googleapis.com/v4/spreadsheets'),
+            request_timeout=google_sheets_conf.getfloat('request_timeout', fallback=30),
+            discovery_file=google_sheets_conf.get('discovery_file'),
+            transport=GoogleSheetsTransport(
+                google_sheets_conf.get('transport', fallback=GoogleSheetsTransport.aiohttp)),
+            executor_pool_size=google_sheets_conf.getint('executor_pool_size', fallback=4),
+            executor_call_timeout=google_sheets_conf.getfloat('executor_call_timeout', fallback=120),
+            coalesce_reads=google_sheets_conf.getboolean('coalesce_reads', fallback=True),
+            coalesce_lease_ms=google_sheets_conf.getint('coalesce_lease_ms', fallback=30000),
+            read_quota_per_minute=google_sheets_conf.getint('read_quota_per_minute', fallback=60),
+            write_quota_per_minute=google_sheets_conf.getint('write_quota_per_minute', fallback=60),
+            retry_max_attempts=google_sheets_conf.getint('retry_max_attempts', fallback=4),
+            retry_base_delay=google_sheets_conf.getfloat('retry_base_delay', fallback=0.5),
+            retry_max_delay=google_sheets_conf.getfloat('retry_max_delay', fallback=8),
+            breaker_failure_threshold=google_sheets_conf.getint('breaker_failure_threshold', fallback=5),
+            breaker_reset_timeout=google_sheets_conf.getfloat('breaker_reset_timeout', fallback=30),
         ),
         google_repository=GoogleRepositoryConfig(
             spreadsheet_id=google_repository_conf.get('spreadsheet_id'),
             users_sheet_name=google_repository_conf.get('users_sheet_name'),
             users_sheet_range=google_repository_conf.get('users_sheet_range'),
-            handbook_expire_seconds=google_repository_conf.get('handbook_expire_seconds'),
+            handbook_expire_seconds=google_repository_conf.getint('handbook_expire_seconds'),
             work_types_sheet_name=google_repository_conf.get('work_types_sheet_name'),
             work_types_sheet_range=google_repository_conf.get('work_types_sheet_range'),
             clients_sheet_name=google_repository_conf.get('clients_sheet_name'),
@@ -113,5 +229,42 @@ def load_config(path: str):
             wtrs_time_plan_cell=google_repository_conf.get('wtrs_time_plan_cell'),
             wtrs_time_fact_cell=google_repository_conf.get('wtrs_time_fact_cell'),
             wtrs_time_net_cell=google_repository_conf.get('wtrs_time_net_cell'),
+            users_expire_seconds=google_repository_conf.getint('users_expire_seconds', fallback=None),
+            work_types_expire_seconds=google_repository_conf.getint('work_types_expire_seconds', fallback=None),
+            clients_expire_seconds=google_repository_conf.getint('clients_expire_seconds', fallback=None),
+            work_time_report_source=WorkTimeReportSource(
+                google_repository_conf.get('work_time_report_source', fallback=WorkTimeReportSource.sheet)
+            ),
+            work_time_report_mirror_expire_seconds=google_repository_conf.getint(
+                'work_time_report_mirror_expire_seconds', fallback=300),
+        ),
+        report_outbox=ReportOutboxConfig(
+            flush_window=report_outbox_conf.getfloat('flush_window', fallback=2),
+            batch_size=report_outbox_conf.getint('batch_size', fallback=200),
+            lease_seconds=report_outbox_conf.getint('lease_seconds', fallback=30),
+        ),
+        fake_sheets=FakeSheetsConfig(
+            latency=fake_sheets_conf.get('latency', fallback='lognormal:150,0.5'),
+            read_quota_per_minute=fake_sheets_conf.getint('read_quota_per_minute', fallback=0),
+            write_quota_per_minute=fake_sheets_conf.getint('write_quota_per_minute', fallback=0),
+            quota_error_rate=fake_sheets_conf.getfloat('quota_error_rate', fallback=0),
+            outage_rate=fake_sheets_conf.getfloat('outage_rate', fallback=0),
+            outage_seconds=fake_sheets_conf.getfloat('outage_seconds', fallback=30),
+            work_day_hours=fake_sheets_conf.getfloat('work_day_hours', fallback=8),
+            seed=fake_sheets_conf.getint('seed', fallback=None),
+            users=fake_sheets_conf.getint('users', fallback=30),
+            work_types=fake_sheets_conf.getint('work_types', fallback=15),
+            clients=fake_sheets_conf.getint('clients', fallback=200),
+            reports=fake_sheets_conf.getint('reports', fallback=5000),
+        ),
+        handbook_refresher=HandbookRefresherConfig(
+            enabled=handbook_refresher_conf.getboolean('enabled', fallback=True),
+            interval=handbook_refresher_conf.getfloat('interval', fallback=0),
+            retry_delay=handbook_refresher_conf.getfloat('retry_delay', fallback=5),
+        ),
+        report_mirror_sync=ReportMirrorSyncConfig(
+            enabled=report_mirror_sync_conf.getboolean('enabled', fallback=True),
+            interval=report_mirror_sync_conf.getfloat('interval', fallback=10),
+            full_interval=report_mirror_sync_conf.getfloat('full_interval', fallback=3600),
         ),
     )
@@ -1,8 +1,12 @@
 from .commands import commands_router, BotCommands
 from .message import messages_router
+from .inline import inline_router
+from .ignore import ignore_router
 
 
 __all__ = [
     'commands_router',
+    'ignore_router',
+    'inline_router',
     'messages_router',
 ]
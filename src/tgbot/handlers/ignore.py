@@ -0,0 +1,19 @@
+from aiogram import F, Router
+from aiogram.types import CallbackQuery
+
+from services.picker import PickerCallback
+from services.scenarios.client_report import ClientReportAct, ClientReportActCallback
+
+from .utils import CalendarCallback
+
+ignore_router = Router(name=__name__)
+
+
+@ignore_router.callback_query(
+    ClientReportActCallback.filter(F.act == ClientReportAct.IGNORE), flags={'skip_auth': True},
+)
+@ignore_router.callback_query(CalendarCallback.filter(F.act == 'IGNORE'), flags={'skip_auth': True})
+@ignore_router.callback_query(PickerCallback.filter(F.act == 'IGNORE'), flags={'skip_auth': True})
+async def ignore_handler(callback_query: CallbackQuery) -> None:
+    """Decorative buttons, answered before auth without touching Redis or Sheets."""
+    await callback_query.answer()
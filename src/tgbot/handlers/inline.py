@@ -0,0 +1,37 @@
+from aiogram import Router
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+from aiogram.types import InlineQueryResultsButton
+
+from models import User
+from services import Application
+from services.constants import Replies
+
+inline_router = Router(name=__name__)
+
+
+@inline_router.inline_query()
+async def client_search_handler(inline_query: InlineQuery, user: User | None, app: Application) -> None:
+    if user is None:
+        await inline_query.answer(
+            [],
+            cache_time=0,
+            is_personal=True,
+            button=InlineQueryResultsButton(text=Replies.PLEASE_AUTH, start_parameter='auth'),
+        )
+        return
+
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+    clients, next_offset = await app.search_clients(inline_query.query, offset)
+    results = [
+        InlineQueryResultArticle(
+            id=str(offset + i),
+            title=client.name,
+            input_message_content=InputTextMessageContent(message_text=client.name),
+        )
+        for i, client in enumerate(clients)
+    ]
+    await inline_query.answer(
+        results,
+        cache_time=30,
+        next_offset=str(next_offset) if next_offset is not None else '',
+    )
@@ -8,6 +8,8 @@ from aiogram.exceptions import TelegramBadRequest
 from models import User, Response, ResponseType, TextMessagesResponse, ReplyKeyboardResponse
 from services import Application
 from services.scenarios.client_report import ClientReportActCallback
+from services.picker import PickerCallback, create_picker_response, resolve_picked
+from services.utils import AnswerCallback
 
 from .utils import SimpleCalendar, CalendarCallback
 
@@ -62,7 +64,11 @@ async def process_response(message: Message, response: Response):
         inline_keyboard = []
         for row in response.inline_keyboard_response.inlines:
             buttons = [
-                InlineKeyboardButton(text=button.text, callback_data=button.callback_data)
+                InlineKeyboardButton(
+                    text=button.text,
+                    callback_data=button.callback_data,
+                    switch_inline_query_current_chat=button.switch_inline_query_current_chat,
+                )
                 for button in row
             ]
             inline_keyboard.append(buttons)
@@ -137,3 +143,52 @@ async def process_client_report(
     msg = callback_data.pack()
     response: Response = await app.execute(msg, user, callback_query.from_user.id)
     await process_response(callback_query.message, response)
+
+
+@messages_router.callback_query(AnswerCallback.filter())
+async def process_answer(
+    callback_query: CallbackQuery,
+    callback_data: AnswerCallback,
+    user: User | None,
+    app: Application,
+):
+    await callback_query.answer()
+    try:
+        await callback_query.message.answer(callback_data.text)
+    except TelegramBadRequest:
+        return
+    response: Response = await app.execute(callback_data.text, user, callback_query.from_user.id)
+    await process_response(callback_query.message, response)
+
+
+@messages_router.callback_query(PickerCallback.filter())
+async def process_picker(
+    callback_query: CallbackQuery,
+    callback_data: PickerCallback,
+    user: User | None,
+    app: Application,
+):
+    await callback_query.answer()
+    if callback_data.act == 'PAGE':
+        response: Response = await create_picker_response(
+            app.repository, callback_data.kind, [], callback_data.page, callback_data.skip, edit=True,
+        )
+        try:
+            await process_response(callback_query.message, response)
+        except TelegramBadRequest:
+            pass
+        return
+    msg = await resolve_picked(app.repository, callback_data)
+    if msg is None:
+        # the handbook has changed, the keyboard is outdated
+        response = await create_picker_response(
+            app.repository, callback_data.kind, [], skip=callback_data.skip, edit=True,
+        )
+        await process_response(callback_query.message, response)
+        return
+    try:
+        await callback_query.message.answer(msg)
+    except TelegramBadRequest:
+        return
+    response = await app.execute(msg, user, callback_query.from_user.id)
+    await process_response(callback_query.message, response)
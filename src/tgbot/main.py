@@ -3,12 +3,20 @@ import logging
 
 from aiogram import Bot, Dispatcher
 
-from config import load_config, LoggerConfig
-from middlewares import AuthMiddleware
-from services import Application, GoogleSheetsApiService, Storage
+from config import load_config, Config, LoggerConfig, GoogleSheetsTransport, WorkTimeReportSource
+from middlewares import AuthMiddleware, CallbackDedupeMiddleware
+from services import Application, Storage, AbstractSheetsService
+from services import AsyncGoogleSheetsApiService, ExecutorGoogleSheetsApiService, GoogleSheetsApiService
+from services import CoalescingSheetsService, FakeGoogleSheetsService, ScheduledSheetsService, SheetsCallPolicy
 from services.notifier import AbstractNotifier, TelegramBotNotifier
+from services.codecs import StorageCodec
+from services.handbook_cache import HandbookCache
+from services.handbook_refresher import HandbookRefresher
+from services.work_time_report_sync import WorkTimeReportSync
+from services.session_cache import SessionCache
+from services.work_time_report_outbox import WorkTimeReportOutbox
 from services.repostiories import Repository, GoogleRepository
-from handlers import commands_router, messages_router, BotCommands
+from handlers import commands_router, messages_router, inline_router, ignore_router, BotCommands
 
 logger = logging.getLogger(__name__)
 
@@ -20,23 +28,114 @@ def configurate_logger(config: LoggerConfig):
     )
 
 
+def create_google_sheets_service(
+    full_config: Config,
+    policy: SheetsCallPolicy,
+) -> AbstractSheetsService:
+    config = full_config.google_sheets
+    if config.transport == GoogleSheetsTransport.fake:
+        fake_config = full_config.fake_sheets
+        service = FakeGoogleSheetsService(
+            repository_config=full_config.google_repository,
+            latency=fake_config.latency,
+            read_quota_per_minute=fake_config.read_quota_per_minute,
+            write_quota_per_minute=fake_config.write_quota_per_minute,
+            quota_error_rate=fake_config.quota_error_rate,
+            outage_rate=fake_config.outage_rate,
+            outage_seconds=fake_config.outage_seconds,
+            work_day_hours=fake_config.work_day_hours,
+            seed=fake_config.seed,
+            policy=policy,
+        )
+        service.seed_synthetic(
+            users=fake_config.users,
+            work_types=fake_config.work_types,
+            clients=fake_config.clients,
+            reports=fake_config.reports,
+        )
+        return service
+    if config.transport == GoogleSheetsTransport.executor:
+        return ExecutorGoogleSheetsApiService(
+            service=GoogleSheetsApiService(
+                creds_file=config.creds_file,
+                discovery_url=config.discovery_url,
+                service_name=config.service_name,
+                scopes=[config.scopes],
+                version=config.version,
+                discovery_file=config.discovery_file,
+                request_timeout=config.request_timeout,
+                policy=policy,
+            ),
+            pool_size=config.executor_pool_size,
+            call_timeout=config.executor_call_timeout,
+        )
+    return AsyncGoogleSheetsApiService(
+        creds_file=config.creds_file,
+        scopes=[config.scopes],
+        api_url=config.api_url,
+        request_timeout=config.request_timeout,
+        policy=policy,
+    )
+
+
+async def log_stats(interval: int, sources: dict[str, object]):
+    while True:
+        await asyncio.sleep(interval)
+        for name, stats in sources.items():
+            logger.info(f'{name} stats: {stats.dict()}')
+
+
 async def main():
     config = load_config('config.ini')
 
     logger.warning('Configurate logger')
     configurate_logger(config.logger)
 
+    if not config.handbook_refresher.enabled:
+        # sessions are not checked per request, deactivated users are logged out by the refresh
+        logger.error('Handbook refresher must be enabled!')
+        return
+
     logger.warning('Initiate storage')
-    storage = Storage.from_url(config.redis.url)
+    codec = StorageCodec(
+        kind=config.redis.codec,
+        compress_threshold=config.redis.compress_threshold,
+    )
+    storage = Storage.from_url(config.redis.url, codec=codec)
 
-    logger.warning('Initiate google repository')
-    google_sheets_service = GoogleSheetsApiService(
-        creds_file=config.google_sheets.creds_file,
-        discovery_url=config.google_sheets.discovery_url,
-        service_name=config.google_sheets.service_name,
-        scopes=[config.google_sheets.scopes],
-        version=config.google_sheets.version,
+    logger.warning('Initiate google sheets service')
+    sheets_call_policy = SheetsCallPolicy(
+        max_attempts=config.google_sheets.retry_max_attempts,
+        base_delay=config.google_sheets.retry_base_delay,
+        max_delay=config.google_sheets.retry_max_delay,
+        failure_threshold=config.google_sheets.breaker_failure_threshold,
+        reset_timeout=config.google_sheets.breaker_reset_timeout,
     )
+    stats_sources = {'storage_codec': codec.stats, 'sheets_calls': sheets_call_policy.stats}
+    google_sheets_service = create_google_sheets_service(config, sheets_call_policy)
+    if isinstance(google_sheets_service, ExecutorGoogleSheetsApiService):
+        stats_sources['sheets_executor'] = google_sheets_service.stats
+        stats_sources['sheets_resource_pool'] = google_sheets_service.service.pool.stats
+    if isinstance(google_sheets_service, FakeGoogleSheetsService):
+        stats_sources['fake_sheets'] = google_sheets_service.stats
+    google_sheets_service = ScheduledSheetsService(
+        service=google_sheets_service,
+        read_quota_per_minute=config.google_sheets.read_quota_per_minute,
+        write_quota_per_minute=config.google_sheets.write_quota_per_minute,
+    )
+    stats_sources['sheets_read_quota'] = google_sheets_service.read_quota.stats
+    stats_sources['sheets_write_quota'] = google_sheets_service.write_quota.stats
+    if config.google_sheets.coalesce_reads:
+        google_sheets_service = CoalescingSheetsService(
+            service=google_sheets_service,
+            storage=storage,
+            lease_ms=config.google_sheets.coalesce_lease_ms,
+        )
+        stats_sources['sheets_coalescing'] = google_sheets_service.stats
+
+    logger.warning('Initiate handbook cache')
+    handbook_cache = HandbookCache(storage=storage)
+    stats_sources['handbook_cache'] = handbook_cache.stats
 
     logger.warning('Initiate google repository')
     google_repository = GoogleRepository(
@@ -62,15 +161,40 @@ async def main():
         wtrs_time_plan_cell=config.google_repository.wtrs_time_plan_cell,
         wtrs_time_fact_cell=config.google_repository.wtrs_time_fact_cell,
         wtrs_time_net_cell=config.google_repository.wtrs_time_net_cell,
+        handbook_cache=handbook_cache,
+        users_expire_seconds=config.google_repository.users_expire_seconds,
+        work_types_expire_seconds=config.google_repository.work_types_expire_seconds,
+        clients_expire_seconds=config.google_repository.clients_expire_seconds,
+        local_reports=config.google_repository.work_time_report_source == WorkTimeReportSource.local,
+        # the sync worker keeps the mirror fresh, it must not expire between ticks
+        work_time_report_mirror_expire_seconds=(
+            0 if config.report_mirror_sync.enabled else config.google_repository.work_time_report_mirror_expire_seconds
+        ),
+    )
+    stats_sources['work_time_report_lock'] = google_repository.work_time_report_lock.stats
+
+    logger.warning('Initiate work time report outbox')
+    outbox = WorkTimeReportOutbox(
+        storage=storage,
+        google_repository=google_repository,
+        flush_window=config.report_outbox.flush_window,
+        batch_size=config.report_outbox.batch_size,
+        lease_seconds=config.report_outbox.lease_seconds,
     )
+    stats_sources['report_outbox'] = outbox.stats
 
     logger.warning('Initiate repository')
     repository = Repository(
         storage=storage,
         google_sheet_service=google_sheets_service,
         google_repository=google_repository,
+        outbox=outbox,
+        scenario_expire_seconds=config.tgbot.scenario_ttl,
     )
 
+    logger.warning('Index user sessions')
+    await repository.users.rebuild_chats_index()
+
     logger.warning('Starting bot')
     bot = Bot(token=config.tgbot.token)
 
@@ -84,20 +208,62 @@ async def main():
     notifier: AbstractNotifier = TelegramBotNotifier(bot=bot)
 
     logger.warning('Create main app interface')
-    app = Application(repository=repository, notifier=notifier)
+    sessions = None
+    if config.tgbot.session_ttl:
+        sessions = SessionCache(ttl=config.tgbot.session_ttl)
+        handbook_cache.add_handler(SessionCache.channel_prefix, sessions.on_invalidation)
+        stats_sources['sessions'] = sessions.stats
+    app = Application(repository=repository, notifier=notifier, sessions=sessions)
 
     dp = Dispatcher(app=app)
     dp.message.middleware(AuthMiddleware(storage=storage))
+    if config.tgbot.callback_dedupe_ms:
+        dp.callback_query.middleware(CallbackDedupeMiddleware(storage, config.tgbot.callback_dedupe_ms))
     dp.callback_query.middleware(AuthMiddleware(storage=storage))
+    dp.inline_query.middleware(AuthMiddleware(storage=storage))
     dp.include_routers(
+        ignore_router,
         commands_router,
+        inline_router,
         messages_router,
     )
 
+    background_tasks = [
+        asyncio.create_task(outbox.run()),
+        asyncio.create_task(handbook_cache.listen()),
+    ]
+    if config.handbook_refresher.enabled:
+        handbook_refresher = HandbookRefresher(
+            google_repository=google_repository,
+            intervals={
+                key: config.handbook_refresher.interval or handbook.expire_seconds * 2 / 3
+                for key, handbook in google_repository.handbooks.items()
+            },
+            retry_delay=config.handbook_refresher.retry_delay,
+        )
+        stats_sources['handbook_refresher'] = handbook_refresher.stats
+        background_tasks.append(asyncio.create_task(handbook_refresher.run()))
+    if google_repository.local_reports and config.report_mirror_sync.enabled:
+        report_sync = WorkTimeReportSync(
+            storage=storage,
+            google_repository=google_repository,
+            interval=config.report_mirror_sync.interval,
+            full_interval=config.report_mirror_sync.full_interval,
+        )
+        stats_sources['work_time_report_sync'] = report_sync.stats
+        background_tasks.append(asyncio.create_task(report_sync.run()))
+    if config.logger.stats_interval and stats_sources:
+        background_tasks.append(asyncio.create_task(
+            log_stats(config.logger.stats_interval, stats_sources)
+        ))
+
     try:
         await dp.start_polling(bot)
     finally:
+        for task in background_tasks:
+            task.cancel()
         await bot.session.close()
+        await google_sheets_service.close()
 
 
 if __name__ == '__main__':
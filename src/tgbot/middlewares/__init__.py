@@ -1,6 +1,8 @@
 from .auth import AuthMiddleware
+from .dedupe import CallbackDedupeMiddleware
 
 
 __all__ = [
-    'AuthMiddleware'
+    'AuthMiddleware',
+    'CallbackDedupeMiddleware',
 ]
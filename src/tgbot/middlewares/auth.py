@@ -3,6 +3,7 @@ import logging
 from typing import Callable, Dict, Any, Awaitable
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import TelegramObject
 
 from services import Application, Storage
@@ -20,6 +21,8 @@ class AuthMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
+        if get_flag(data, 'skip_auth'):
+            return await handler(event, data)
         app: Application = data['dispatcher'].get('app')
         chat_id = event.from_user.id
         user = await app.auth(chat_id)
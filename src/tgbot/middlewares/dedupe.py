@@ -0,0 +1,50 @@
+import logging
+
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery
+
+from services import Storage
+from services.constants import RedisKeys
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackDedupeMiddleware(BaseMiddleware):
+    """
+    Drops a callback if the same chat sent the same payload within `window_ms`,
+    e.g. a double tap on "Удалить". The duplicate is acknowledged so the button
+    stops spinning. Must be registered before AuthMiddleware.
+    """
+
+    _dedupe_key = RedisKeys.CALLBACK_DEDUPE_KEY
+
+    def __init__(self, storage: Storage, window_ms: int = 1000):
+        self.storage = storage
+        self.window_ms = window_ms
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any],
+    ) -> Any:
+        if get_flag(data, 'skip_auth') or not event.data:
+            return await handler(event, data)
+        try:
+            first = await self.storage.set_nx(
+                keys=[self._dedupe_key, event.from_user.id, event.data],
+                data={'id': event.id},
+                expired_ms=self.window_ms,
+            )
+        except Exception as exc:
+            # better a duplicate than a lost tap
+            logger.exception(exc)
+            first = True
+        if not first:
+            logger.debug(f'Duplicate callback {event.data} from {event.from_user.id} dropped')
+            await event.answer()
+            return None
+        return await handler(event, data)
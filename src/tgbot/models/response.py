@@ -12,7 +12,8 @@ class ResponseType(StrEnum):
 @dataclass
 class InlineButton:
     text: str
-    callback_data: str
+    callback_data: str | None = None
+    switch_inline_query_current_chat: str | None = None
 
 
 @dataclass
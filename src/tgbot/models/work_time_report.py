@@ -9,6 +9,8 @@ class WorkTimeReportStat:
     time_plan: str | None = None
     time_fact: str | None = None
     time_net: str | None = None
+    # plan and net come from the sheet formulas, local reports leave them unset
+    plan_available: bool = True
 
     dict = asdict
 
@@ -19,15 +21,18 @@ class WorkTimeReportStat:
             report_date = f"с {report_from_date} по {report_to_date}"
         else:
             report_date = ''
-        time_plan = re.escape(self.time_plan if self.time_plan else '00:00:00')
         time_fact = re.escape(self.time_fact if self.time_fact else '00:00:00')
-        time_net = re.escape(self.time_net if self.time_net else '00:00:00')
+        if self.plan_available:
+            time_plan = re.escape(self.time_plan if self.time_plan else '00:00:00') + ' ч'
+            time_net = re.escape(self.time_net if self.time_net else '00:00:00') + ' ч'
+        else:
+            time_plan = time_net = 'нет данных'
         return f"""
 *Общий отчет {report_date}*
 
-План: *{time_plan} ч*
+План: *{time_plan}*
 Факт: *{time_fact} ч*
-Сальдо: *{time_net} ч*
+Сальдо: *{time_net}*
 """
 
 
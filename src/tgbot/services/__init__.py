@@ -1,10 +1,23 @@
 from .application import Application
 from .google_sheets_api_service import GoogleSheetsApiService
+from .google_sheets_async_api_service import AbstractSheetsService, AsyncGoogleSheetsApiService
+from .google_sheets_coalescing_service import CoalescingSheetsService
+from .google_sheets_executor_service import ExecutorGoogleSheetsApiService
+from .google_sheets_fake_service import FakeGoogleSheetsService
+from .google_sheets_resilience import SheetsCallPolicy
+from .google_sheets_scheduler import ScheduledSheetsService
 from .storage import Storage
 
 
 __all__ = [
     'Application',
+    'AbstractSheetsService',
+    'AsyncGoogleSheetsApiService',
+    'CoalescingSheetsService',
+    'ExecutorGoogleSheetsApiService',
+    'FakeGoogleSheetsService',
     'GoogleSheetsApiService',
+    'ScheduledSheetsService',
+    'SheetsCallPolicy',
     'Storage',
 ]
@@ -1,26 +1,40 @@
 import logging
+from dataclasses import replace
 
-from models import User, Response
+from models import User, Response, Client
 
 from .constants import Replies, MenuButtons
 from .notifier import AbstractNotifier
 from .repostiories import Repository
 from .scenarios import ClientReportScenario, WorkTimeReportScenario
+from .session_cache import SessionCache
 from .utils import create_reply_keyboard_response, create_message_response
 
 logger = logging.getLogger(__name__)
 
 
 class Application:
-    def __init__(self, repository: Repository, notifier: AbstractNotifier):
+    def __init__(
+        self,
+        repository: Repository,
+        notifier: AbstractNotifier,
+        sessions: SessionCache | None = None,
+    ):
         self.repository = repository
         self.notifier = notifier
+        self.sessions = sessions
 
     async def logout(self, user: User | None):
         if user is None:
             return await self.start(user)
         await self.repository.work_time_reports.delete_scenario_and_reports_from_cache(user)
-        await self.repository.users.delete_user(user.chat_id)
+        await self.repository.users.delete_user(user.chat_id, user.id)
+        if self.sessions is not None:
+            self.sessions.delete(user.chat_id)
+            # other processes may hold the session too
+            await self.repository.google_repository.handbook_cache.publish(
+                SessionCache.channel_prefix, user.chat_id,
+            )
         return await self.execute(user_message=None, user=None, chat_id=user.chat_id)
 
     async def back(self, user: User | None) -> Response:
@@ -74,7 +88,18 @@ class Application:
         )
 
     async def auth(self, chat_id: int) -> User | None:
-        return await self.repository.users.get_user_by_chat_id(chat_id)
+        if self.sessions is None:
+            return await self.repository.users.get_user_by_chat_id(chat_id)
+        version = await self.repository.google_repository.handbook_cache.get_version()
+        user = self.sessions.get(chat_id, version)
+        if user is None:
+            user = await self.repository.users.get_user_by_chat_id(chat_id)
+            if user is not None:
+                self.sessions.set(chat_id, user, version)
+        return user
+
+    async def search_clients(self, query: str, offset: int = 0) -> tuple[list[Client], int | None]:
+        return await self.repository.clients.search(query, offset)
 
     async def authenticate(self, user_code: str | None, chat_id: int | None = None) -> Response:
         if user_code is not None:
@@ -83,7 +108,8 @@ class Application:
                 return await create_message_response([
                     Replies.WRONG_PERSONAL_CODE, Replies.PLEASE_AUTH, Replies.ENTER_PERSONAL_CODE
                 ])
-            user.chat_id = chat_id
+            # users from the handbook cache are shared, never mutate them
+            user = replace(user, chat_id=chat_id)
             await self.repository.users.upsert(user)
             await self.notifier.notify(f'Вы авторизовались как {user.fullname}', user)
             return await self.menu(user)
@@ -0,0 +1,94 @@
+from cachetools import LRUCache
+
+from models import Client
+
+
+def normalize_name(name: str) -> str:
+    return ' '.join(name.split()).casefold()
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ClientSearchIndex:
+    """
+    Substring search over client names.
+
+    Queries shorter than three characters go through a word prefix index,
+    longer ones intersect trigram postings and check the candidates. Matches
+    are ranked: name prefix, word prefix, anything else, keeping the handbook order.
+    """
+
+    def __init__(self, clients: tuple[Client, ...]):
+        self.clients = clients
+        self.names = [normalize_name(client.name) for client in clients]
+        self.by_name = {}
+        self.prefixes: dict[str, list[int]] = {}
+        self.trigrams: dict[str, set[int]] = {}
+        for i, name in enumerate(self.names):
+            self.by_name.setdefault(name, clients[i])
+            word_prefixes = {word[:size] for word in name.split() for size in (1, 2)}
+            for prefix in word_prefixes:
+                self.prefixes.setdefault(prefix, []).append(i)
+            for trigram in _trigrams(name):
+                self.trigrams.setdefault(trigram, set()).add(i)
+
+    def get(self, name: str) -> Client | None:
+        return self.by_name.get(normalize_name(name))
+
+    def match(self, query: str, candidates: list[int] | None = None) -> list[int]:
+        """Ids of clients matching the normalized query, `candidates` narrows the search."""
+        if not query:
+            return list(range(len(self.clients)))
+        if candidates is None:
+            candidates = self._candidates(query)
+        return self._rank(query, [i for i in candidates if query in self.names[i]])
+
+    def _candidates(self, query: str) -> list[int]:
+        if len(query) < 3:
+            return self.prefixes.get(query, [])
+        postings = sorted((self.trigrams.get(t, set()) for t in _trigrams(query)), key=len)
+        candidates = set.intersection(*postings) if postings else set()
+        return sorted(candidates)
+
+    def _rank(self, query: str, ids: list[int]) -> list[int]:
+        def rank(i: int) -> int:
+            name = self.names[i]
+            if name.startswith(query):
+                return 0
+            if f' {query}' in name:
+                return 1
+            return 2
+        return sorted(ids, key=lambda i: (rank(i), i))
+
+
+class ClientSearchCache:
+    """
+    LRU cache of matched ids per (handbook version, query). A longer query is
+    answered by filtering the cached matches of its longest cached prefix, so
+    every typed letter only rescans the previous answer.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.answers: LRUCache = LRUCache(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def search(self, version: int, index: ClientSearchIndex, query: str) -> list[int]:
+        query = normalize_name(query)
+        ids = self.answers.get((version, query))
+        if ids is not None:
+            self.hits += 1
+            return ids
+        self.misses += 1
+        candidates = None
+        # shorter queries are matched by word prefix, not substring, and can't narrow the search
+        for size in range(len(query) - 1, 2, -1):
+            prefix_ids = self.answers.get((version, query[:size]))
+            if prefix_ids is not None:
+                candidates = sorted(prefix_ids)
+                break
+        ids = index.match(query, candidates)
+        self.answers[(version, query)] = ids
+        return ids
@@ -0,0 +1,90 @@
+import json
+import zlib
+from dataclasses import dataclass, asdict
+from enum import StrEnum
+from typing import Any
+
+import msgpack
+
+
+class CodecKind(StrEnum):
+    json = 'json'
+    msgpack = 'msgpack'
+
+
+@dataclass
+class CodecStats:
+    encoded: int = 0
+    compressed: int = 0
+    encoded_bytes: int = 0
+    plain_json_decoded: int = 0
+
+    dict = asdict
+
+
+class StorageCodec:
+    """
+    Serializes Storage payloads.
+
+    Values start with a header byte: the codec id, with the high bit set when
+    the body is zlib-compressed. Plain uncompressed JSON is written without
+    a header, exactly as before, so `json` without compression keeps the old
+    format. Values without a header (they start with `{` or `[`) are read as
+    legacy JSON whatever codec is configured, switching codecs needs no migration.
+    """
+
+    _ids = {CodecKind.json: 0x01, CodecKind.msgpack: 0x02}
+    _compressed_flag = 0x80
+
+    def __init__(
+        self,
+        kind: CodecKind = CodecKind.json,
+        compress_threshold: int = 0,
+        compress_level: int = 6,
+    ):
+        self.kind = kind
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+        self.stats = CodecStats()
+
+    @staticmethod
+    def _dumps(kind: CodecKind, data: Any) -> bytes:
+        if kind == CodecKind.msgpack:
+            return msgpack.packb(data, use_bin_type=True)
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def _loads(kind: CodecKind, body: bytes) -> Any:
+        if kind == CodecKind.msgpack:
+            return msgpack.unpackb(body, raw=False)
+        return json.loads(body)
+
+    def encode(self, data: Any) -> bytes:
+        body = self._dumps(self.kind, data)
+        header = self._ids[self.kind]
+        if self.compress_threshold and len(body) >= self.compress_threshold:
+            body = zlib.compress(body, self.compress_level)
+            header |= self._compressed_flag
+            self.stats.compressed += 1
+        elif self.kind == CodecKind.json:
+            header = None
+        value = body if header is None else bytes((header,)) + body
+        self.stats.encoded += 1
+        self.stats.encoded_bytes += len(value)
+        return value
+
+    def decode(self, value: bytes | str | None) -> Any:
+        if not value:
+            # an empty stored value, read as no data like a missing key
+            return {}
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        header = value[0]
+        kind = next((k for k, i in self._ids.items() if i == header & ~self._compressed_flag), None)
+        if kind is None:
+            self.stats.plain_json_decoded += 1
+            return json.loads(value)
+        body = value[1:]
+        if header & self._compressed_flag:
+            body = zlib.decompress(body)
+        return self._loads(kind, body)
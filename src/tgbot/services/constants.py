@@ -6,12 +6,25 @@ from emoji import emojize
 class RedisKeys(StrEnum):
     USERS_LIST_KEY = 'users'
     USER_KEY = 'user'
+    USER_CHATS_KEY = 'user_chats'
     SCENARIO_KEY = 'scenario'
     WORK_TYPES_KEY = 'work_types'
     CLIENTS_KEY = 'clients'
     WORK_TIME_REPORT_KEY = 'work_time_report'
     WORK_TIME_REPORT_STAT_KEY = 'work_time_report_stat'
     WORK_TIME_REPORT_LOCK_KEY = 'work_time_report_lock'
+    SHEETS_FLIGHT_KEY = 'sheets_flight'
+    HANDBOOK_SNAPSHOT_KEY = 'handbook_snapshot'
+    HANDBOOK_HASH_KEY = 'handbook_hash'
+    CALLBACK_DEDUPE_KEY = 'callback_dedupe'
+    WORK_TIME_REPORT_OUTBOX_KEY = 'work_time_report_outbox'
+    WORK_TIME_REPORT_OUTBOX_LOCK_KEY = 'work_time_report_outbox_lock'
+    WORK_TIME_REPORT_MIRROR_KEY = 'work_time_report_mirror'
+    WORK_TIME_REPORT_MIRROR_VERSION_KEY = 'work_time_report_mirror_version'
+    WORK_TIME_REPORT_MIRROR_LOCK_KEY = 'work_time_report_mirror_lock'
+    WORK_TIME_REPORT_MIRROR_SYNC_KEY = 'work_time_report_mirror_sync'
+    HANDBOOK_VERSION_KEY = 'handbook_version'
+    HANDBOOK_INVALIDATION_CHANNEL = 'handbook_invalidation'
 
 
 class MenuButtons(StrEnum):
@@ -47,6 +60,8 @@ class Replies:
     WRONG_WORK_TYPE = emojize('Не могу найти такой вид работы :man_shrugging:')
     CHOOSE_CLIENT = emojize('Выберите клиента из списка :open_file_folder:')
     WRONG_CLIENT = emojize('Не могу найти такого клиента :man_shrugging:')
+    SEARCH_CLIENT = 'Или нажмите «Поиск клиента» и начните вводить название'
+    SEARCH_CLIENT_BUTTON = emojize(':magnifying_glass_tilted_left: Поиск клиента')
 
     ENTER_TIME = 'Введите затраченное время в формате ЧЧ:ММ'
     CHOOSE_TIME = emojize('Или выберите из списка :alarm_clock:')
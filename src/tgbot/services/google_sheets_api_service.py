@@ -1,9 +1,16 @@
 import logging
+import os
 import re
+import threading
+from dataclasses import dataclass, asdict
 
+import httplib2
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.discovery_cache.file_cache import Cache
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+from .google_sheets_resilience import SheetsCallPolicy, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +20,88 @@ def parse_row_from_range(range_str: str) -> int:
     return int(re.sub(r'[a-zA-Z]', '', row_id_str))
 
 
+@dataclass
+class ResourcePoolStats:
+    hits: int = 0
+    misses: int = 0
+    discovery_loads: int = 0
+
+    dict = asdict
+
+
+class SheetsResourcePool:
+    """
+    Keeps one `spreadsheets()` resource per thread (httplib2 transports are not
+    thread-safe) built from a discovery document that is loaded only once.
+    """
+
+    def __init__(
+        self,
+        creds,
+        discovery_url: str,
+        service_name: str,
+        version: str,
+        discovery_file: str | None = None,
+        http_timeout: float | None = None,
+    ):
+        self.creds = creds
+        self.discovery_url = discovery_url
+        self.service_name = service_name
+        self.version = version
+        self.discovery_file = discovery_file
+        self.http_timeout = http_timeout
+        self.stats = ResourcePoolStats()
+        self._document: str | None = None
+        self._document_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+
+    def get(self):
+        resource = getattr(self._local, 'resource', None)
+        if resource is not None:
+            with self._stats_lock:
+                self.stats.hits += 1
+            return resource
+
+        with self._stats_lock:
+            self.stats.misses += 1
+        http = AuthorizedHttp(self.creds, http=httplib2.Http(timeout=self.http_timeout))
+        service = build_from_document(self.get_discovery_document(), http=http)
+        resource = service.spreadsheets()
+        self._local.resource = resource
+        logger.debug(f'Sheets resource built for thread {threading.current_thread().name}, '
+                     f'pool stats: {self.stats.dict()}')
+        return resource
+
+    def get_discovery_document(self) -> str:
+        if self._document is not None:
+            return self._document
+        with self._document_lock:
+            if self._document is None:
+                self._document = self._load_discovery_document()
+                self.stats.discovery_loads += 1
+        return self._document
+
+    def _load_discovery_document(self) -> str:
+        if self.discovery_file and os.path.exists(self.discovery_file):
+            with open(self.discovery_file, encoding='utf-8') as f:
+                return f.read()
+
+        document = get_static_doc(self.service_name, self.version)
+        if document is None:
+            logger.warning(f'No bundled discovery document for {self.service_name} {self.version}, '
+                           f'fetching {self.discovery_url}')
+            resp, content = httplib2.Http(timeout=self.http_timeout).request(self.discovery_url)
+            if resp.status >= 400:
+                raise RuntimeError(f'Can`t fetch discovery document: {resp.status}')
+            document = content.decode('utf-8')
+
+        if self.discovery_file:
+            with open(self.discovery_file, 'w', encoding='utf-8') as f:
+                f.write(document)
+        return document
+
+
 class GoogleSheetsApiService:
     def __init__(
         self,
@@ -21,6 +110,9 @@ class GoogleSheetsApiService:
         service_name: str,
         version: str,
         scopes: list[str],
+        discovery_file: str | None = None,
+        request_timeout: float | None = None,
+        policy: SheetsCallPolicy | None = None,
     ):
         self.creds_file = creds_file
         self.scopes = scopes
@@ -28,6 +120,15 @@ class GoogleSheetsApiService:
         self.service_name = service_name
         self.version = version
         self.creds = self.get_creds()
+        self.policy = policy or SheetsCallPolicy()
+        self.pool = SheetsResourcePool(
+            creds=self.creds,
+            discovery_url=discovery_url,
+            service_name=service_name,
+            version=version,
+            discovery_file=discovery_file,
+            http_timeout=request_timeout,
+        )
 
     def get_creds(self):
         creds = service_account.Credentials.from_service_account_file(
@@ -37,32 +138,23 @@ class GoogleSheetsApiService:
         return creds
 
     def build_service(self):
-        try:
-            service = build(
-                self.service_name,
-                self.version,
-                credentials=self.creds,
-                cache=Cache(max_age=30),
-            )
-        except Exception as exc:
-            logger.exception(exc)
-            service = build(
-                self.service_name,
-                self.version,
-                discoveryServiceUrl=self.discovery_url,
-                credentials=self.creds,
-                cache=Cache(max_age=30),
-            )
-        return service.spreadsheets()
+        return self.pool.get()
+
+    def _execute(self, spreadsheet_id: str, request, idempotent: bool = True) -> dict:
+        return self.policy.call_sync(spreadsheet_id, request.execute, idempotent)
 
     def get_range(self, spreadsheet_id: str, sheet_name: str, sheet_range: str) -> list[str]:
         try:
             service = self.build_service()
-            result = service.values().get(
+            request = service.values().get(
                 spreadsheetId=spreadsheet_id,
                 range=sheet_name + '!' + sheet_range,
-            ).execute()
+            )
+            result = self._execute(spreadsheet_id, request)
             return result.get('values', [])
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return []
         except Exception as exc:
             logger.exception(exc)
             return []
@@ -70,16 +162,20 @@ class GoogleSheetsApiService:
     def get_ranges(self, spreadsheet_id: str, ranges: list[tuple[str, str]]) -> list[list[str]]:
         try:
             service = self.build_service()
-            result = service.values().batchGet(
+            request = service.values().batchGet(
                 spreadsheetId=spreadsheet_id,
                 ranges=[k + '!' + v for k, v in ranges]
-            ).execute()
+            )
+            result = self._execute(spreadsheet_id, request)
             values_ranges = []
             for values_range in result.get('valueRanges', []):
                 values = values_range.get('values', [])
                 values_list = [v for v in values if v != []]
                 values_ranges.append(values_list)
             return values_ranges
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return []
         except Exception as exc:
             logger.exception(exc)
             return []
@@ -94,12 +190,16 @@ class GoogleSheetsApiService:
         try:
             service = self.build_service()
             body = {'values': [data]}
-            service.values().update(
+            request = service.values().update(
                 spreadsheetId=spreadsheet_id,
                 range=sheet_name + '!' + sheet_range,
                 valueInputOption='USER_ENTERED',
                 body=body,
-            ).execute()
+            )
+            self._execute(spreadsheet_id, request)
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return False
         except Exception as exc:
             logger.exception(exc)
             return False
@@ -119,10 +219,14 @@ class GoogleSheetsApiService:
                         'range': sheet_name + '!' + sheet_range,
                         'values': sheet_values,
                     })
-            service.values().batchUpdate(
+            request = service.values().batchUpdate(
                 spreadsheetId=spreadsheet_id,
                 body=body,
-            ).execute()
+            )
+            self._execute(spreadsheet_id, request)
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return False
         except Exception as exc:
             logger.exception(exc)
             return False
@@ -139,14 +243,18 @@ class GoogleSheetsApiService:
         try:
             service = self.build_service()
             body = {'values': data}
-            result = service.values().append(
+            request = service.values().append(
                 spreadsheetId=spreadsheet_id,
                 range=sheet_name + '!' + sheet_range,
                 valueInputOption='USER_ENTERED',
                 body=body,
-            ).execute()
+            )
+            result = self._execute(spreadsheet_id, request, idempotent=False)
             if return_row_id:
                 return parse_row_from_range(result['updates']['updatedRange'])
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return False
         except Exception as exc:
             logger.exception(exc)
             return False
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from urllib.parse import quote
+
+import aiohttp
+from google.auth import crypt, jwt
+
+from .google_sheets_api_service import parse_row_from_range
+from .google_sheets_resilience import SheetsCallPolicy, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class AbstractSheetsService(ABC):
+    @abstractmethod
+    async def get_range(self, spreadsheet_id: str, sheet_name: str, sheet_range: str) -> list[str]:
+        pass
+
+    @abstractmethod
+    async def get_ranges(self, spreadsheet_id: str, ranges: list[tuple[str, str]]) -> list[list[str]]:
+        pass
+
+    @abstractmethod
+    async def update_one(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    async def update_many(
+        self,
+        spreadsheet_id: str,
+        data: dict[str, dict[str, list[list[str]]]],
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    async def append(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+        return_row_id: bool = False,
+    ) -> bool | int:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class ServiceAccountTokenProvider:
+    _grant_type = 'urn:ietf:params:oauth:grant-type:jwt-bearer'
+    _token_lifetime = 3600
+    _refresh_margin = 60
+
+    def __init__(self, creds_file: str, scopes: list[str]):
+        with open(creds_file) as f:
+            info = json.load(f)
+        self.signer = crypt.RSASigner.from_service_account_info(info)
+        self.service_account_email = info['client_email']
+        self.token_uri = info['token_uri']
+        self.scopes = scopes
+        self._token = None
+        self._expiry = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get_token(self, session: aiohttp.ClientSession) -> str:
+        if self._token and time.time() < self._expiry - self._refresh_margin:
+            return self._token
+        async with self._lock:
+            if self._token and time.time() < self._expiry - self._refresh_margin:
+                return self._token
+            await self._refresh(session)
+        return self._token
+
+    async def _refresh(self, session: aiohttp.ClientSession) -> None:
+        now = int(time.time())
+        payload = {
+            'iss': self.service_account_email,
+            'scope': ' '.join(self.scopes),
+            'aud': self.token_uri,
+            'iat': now,
+            'exp': now + self._token_lifetime,
+        }
+        assertion = jwt.encode(self.signer, payload).decode('utf-8')
+        async with session.post(
+            self.token_uri,
+            data={'grant_type': self._grant_type, 'assertion': assertion},
+        ) as resp:
+            resp.raise_for_status()
+            result = await resp.json()
+        self._token = result['access_token']
+        self._expiry = now + int(result.get('expires_in', self._token_lifetime))
+        logger.debug(f'Google access token refreshed, expires in {result.get("expires_in")}s')
+
+
+class AsyncGoogleSheetsApiService(AbstractSheetsService):
+    def __init__(
+        self,
+        creds_file: str,
+        scopes: list[str],
+        api_url: str = 'https://sheets.googleapis.com/v4/spreadsheets',
+        request_timeout: float = 30,
+        token_provider: ServiceAccountTokenProvider | None = None,
+        policy: SheetsCallPolicy | None = None,
+    ):
+        self.api_url = api_url.rstrip('/')
+        self.request_timeout = request_timeout
+        self.policy = policy or SheetsCallPolicy()
+        self.token_provider = token_provider or ServiceAccountTokenProvider(creds_file, scopes)
+        self._session: aiohttp.ClientSession | None = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _request(
+        self,
+        method: str,
+        spreadsheet_id: str,
+        path: str,
+        params: list[tuple[str, str]] | None = None,
+        body: dict | None = None,
+        idempotent: bool = True,
+    ) -> dict:
+        return await self.policy.call(
+            spreadsheet_id,
+            lambda: self._send(method, spreadsheet_id, path, params, body),
+            idempotent,
+        )
+
+    async def _send(
+        self,
+        method: str,
+        spreadsheet_id: str,
+        path: str,
+        params: list[tuple[str, str]] | None = None,
+        body: dict | None = None,
+    ) -> dict:
+        session = self.get_session()
+        token = await self.token_provider.get_token(session)
+        url = f'{self.api_url}/{spreadsheet_id}/{path}'
+        async with session.request(
+            method,
+            url,
+            params=params,
+            json=body,
+            headers={'Authorization': f'Bearer {token}'},
+        ) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def get_range(self, spreadsheet_id: str, sheet_name: str, sheet_range: str) -> list[str]:
+        try:
+            result = await self._request(
+                'GET',
+                spreadsheet_id,
+                f'values/{quote(sheet_name + "!" + sheet_range, safe="")}',
+            )
+            return result.get('values', [])
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return []
+        except Exception as exc:
+            logger.exception(exc)
+            return []
+
+    async def get_ranges(self, spreadsheet_id: str, ranges: list[tuple[str, str]]) -> list[list[str]]:
+        try:
+            result = await self._request(
+                'GET',
+                spreadsheet_id,
+                'values:batchGet',
+                params=[('ranges', k + '!' + v) for k, v in ranges],
+            )
+            values_ranges = []
+            for values_range in result.get('valueRanges', []):
+                values = values_range.get('values', [])
+                values_list = [v for v in values if v != []]
+                values_ranges.append(values_list)
+            return values_ranges
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return []
+        except Exception as exc:
+            logger.exception(exc)
+            return []
+
+    async def update_one(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+    ) -> bool:
+        try:
+            await self._request(
+                'PUT',
+                spreadsheet_id,
+                f'values/{quote(sheet_name + "!" + sheet_range, safe="")}',
+                params=[('valueInputOption', 'USER_ENTERED')],
+                body={'values': [data]},
+            )
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return False
+        except Exception as exc:
+            logger.exception(exc)
+            return False
+        return True
+
+    async def update_many(
+        self,
+        spreadsheet_id: str,
+        data: dict[str, dict[str, list[list[str]]]],
+    ) -> bool:
+        try:
+            body = {'data': [], 'valueInputOption': 'USER_ENTERED'}
+            for sheet_name, sheet_data in data.items():
+                for sheet_range, sheet_values in sheet_data.items():
+                    body['data'].append({
+                        'range': sheet_name + '!' + sheet_range,
+                        'values': sheet_values,
+                    })
+            await self._request('POST', spreadsheet_id, 'values:batchUpdate', body=body)
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return False
+        except Exception as exc:
+            logger.exception(exc)
+            return False
+        return True
+
+    async def append(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+        return_row_id: bool = False,
+    ) -> bool | int:
+        try:
+            result = await self._request(
+                'POST',
+                spreadsheet_id,
+                f'values/{quote(sheet_name + "!" + sheet_range, safe="")}:append',
+                params=[('valueInputOption', 'USER_ENTERED')],
+                body={'values': data},
+                idempotent=False,
+            )
+            if return_row_id:
+                return parse_row_from_range(result['updates']['updatedRange'])
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return False
+        except Exception as exc:
+            logger.exception(exc)
+            return False
+        return True
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, asdict
+
+from .constants import RedisKeys
+from .google_sheets_async_api_service import AbstractSheetsService
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CoalescingStats:
+    leader_calls: int = 0
+    local_joins: int = 0
+    remote_joins: int = 0
+    lease_timeouts: int = 0
+
+    dict = asdict
+
+
+class CoalescingSheetsService(AbstractSheetsService):
+    """
+    Single-flight for `get_ranges`: concurrent callers asking for the same
+    spreadsheet and ranges share one in-flight request.
+
+    In-process callers share one fetch task owned by the coalescer, so a
+    cancelled caller never cancels it for the others. Other bot processes see
+    the leader's lease in Redis and wait for the result it publishes under the
+    lease token, so only callers that overlapped with the request get its
+    result and a caller arriving after it finished always fetches fresh data.
+    """
+
+    _flight_key = RedisKeys.SHEETS_FLIGHT_KEY
+
+    def __init__(
+        self,
+        service: AbstractSheetsService,
+        storage: Storage,
+        lease_ms: int = 30000,
+        poll_interval: float = 0.05,
+    ):
+        self.service = service
+        self.storage = storage
+        self.lease_ms = lease_ms
+        self.poll_interval = poll_interval
+        self.stats = CoalescingStats()
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    async def close(self) -> None:
+        await self.service.close()
+
+    async def get_ranges(self, spreadsheet_id: str, ranges: list[tuple[str, str]]) -> list[list[str]]:
+        flight_id = hashlib.sha1(
+            json.dumps([spreadsheet_id, ranges], ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+
+        flight = self._in_flight.get(flight_id)
+        if flight is not None:
+            self.stats.local_joins += 1
+        else:
+            # shielded, the fetch outlives any cancelled caller
+            flight = asyncio.create_task(self._get_ranges_shared(flight_id, spreadsheet_id, ranges))
+            self._in_flight[flight_id] = flight
+            flight.add_done_callback(lambda task: self._finish_flight(flight_id, task))
+        return await asyncio.shield(flight)
+
+    def _finish_flight(self, flight_id: str, task: asyncio.Task) -> None:
+        del self._in_flight[flight_id]
+        if not task.cancelled() and task.exception() is not None:
+            # every caller may be gone, mark the exception as retrieved
+            logger.debug(f'Sheets flight {flight_id} failed: {task.exception()!r}')
+
+    async def _get_ranges_shared(
+        self,
+        flight_id: str,
+        spreadsheet_id: str,
+        ranges: list[tuple[str, str]],
+    ) -> list[list[str]]:
+        lease_keys = [self._flight_key, flight_id]
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lease_ms / 1000
+        while True:
+            if await self.storage.set_nx(lease_keys, {'token': token}, self.lease_ms):
+                break
+            lease = await self.storage.get_data(keys=lease_keys)
+            if not lease:
+                continue
+            result = await self._wait_result(lease_keys, lease['token'], deadline)
+            if result is not None:
+                self.stats.remote_joins += 1
+                return result
+            if time.monotonic() >= deadline:
+                self.stats.lease_timeouts += 1
+                logger.warning(f'Sheets flight {flight_id} lease timeout, fetching ranges directly')
+                return await self.service.get_ranges(spreadsheet_id, ranges)
+
+        self.stats.leader_calls += 1
+        try:
+            result = await self.service.get_ranges(spreadsheet_id, ranges)
+            await self.storage.set_data(
+                keys=[self._flight_key, flight_id, token],
+                data={'ranges': result},
+                expired=max(1, self.lease_ms // 1000),
+            )
+        finally:
+            await self.storage.del_keys([lease_keys])
+        return result
+
+    async def _wait_result(
+        self,
+        lease_keys: list[str],
+        token: str,
+        deadline: float,
+    ) -> list[list[str]] | None:
+        while time.monotonic() < deadline:
+            result = await self.storage.get_data(keys=[*lease_keys, token])
+            if result:
+                return result['ranges']
+            lease = await self.storage.get_data(keys=lease_keys)
+            if lease.get('token') != token:
+                # leader is gone, the result (if any) has just been published
+                result = await self.storage.get_data(keys=[*lease_keys, token])
+                return result['ranges'] if result else None
+            await asyncio.sleep(self.poll_interval)
+        return None
+
+    async def get_range(self, spreadsheet_id: str, sheet_name: str, sheet_range: str) -> list[str]:
+        return await self.service.get_range(spreadsheet_id, sheet_name, sheet_range)
+
+    async def update_one(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+    ) -> bool:
+        return await self.service.update_one(spreadsheet_id, sheet_name, sheet_range, data)
+
+    async def update_many(
+        self,
+        spreadsheet_id: str,
+        data: dict[str, dict[str, list[list[str]]]],
+    ) -> bool:
+        return await self.service.update_many(spreadsheet_id, data)
+
+    async def append(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+        return_row_id: bool = False,
+    ) -> bool | int:
+        return await self.service.append(
+            spreadsheet_id, sheet_name, sheet_range, data, return_row_id=return_row_id,
+        )
@@ -0,0 +1,154 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Callable
+
+from .google_sheets_api_service import GoogleSheetsApiService
+from .google_sheets_async_api_service import AbstractSheetsService
+from .google_sheets_resilience import SheetsApiError, record_call_error, track_sheets_calls
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExecutorStats:
+    submitted: int = 0
+    completed: int = 0
+    timeouts: int = 0
+    cancelled: int = 0
+    # timed out while running, the thread finishes the call and its result is discarded
+    abandoned: int = 0
+    queue_depth: int = 0
+    running: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+
+    dict = asdict
+
+    @property
+    def wait_time_avg(self) -> float:
+        started = self.completed + self.running
+        return self.wait_time_total / started if started else 0.0
+
+
+class ExecutorGoogleSheetsApiService(AbstractSheetsService):
+    """
+    Runs the blocking GoogleSheetsApiService calls in a dedicated thread pool,
+    so the event loop only awaits them.
+
+    A call that times out while still queued is cancelled. One that already runs
+    can not be stopped: it keeps its thread, and a write may still be applied,
+    so `call_timeout` should exceed the request timeout with the retries.
+    """
+
+    def __init__(
+        self,
+        service: GoogleSheetsApiService,
+        pool_size: int = 4,
+        call_timeout: float | None = 120,
+    ):
+        self.service = service
+        self.pool_size = pool_size
+        self.call_timeout = call_timeout
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='sheets')
+        self.stats = ExecutorStats()
+        self._stats_lock = threading.Lock()
+
+    async def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, default: Any, func: Callable, *args, **kwargs) -> Any:
+        submitted_at = time.monotonic()
+
+        def call():
+            wait_time = time.monotonic() - submitted_at
+            with self._stats_lock:
+                self.stats.queue_depth -= 1
+                self.stats.running += 1
+                self.stats.wait_time_total += wait_time
+                self.stats.wait_time_max = max(self.stats.wait_time_max, wait_time)
+            try:
+                # an outcome of its own, an abandoned call must not overwrite the caller's one
+                with track_sheets_calls() as outcome:
+                    return func(*args, **kwargs), outcome.error
+            finally:
+                with self._stats_lock:
+                    self.stats.running -= 1
+                    self.stats.completed += 1
+
+        with self._stats_lock:
+            self.stats.submitted += 1
+            self.stats.queue_depth += 1
+        future = self.executor.submit(contextvars.copy_context().run, call)
+        try:
+            result, error = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.call_timeout)
+            if error is not None:
+                record_call_error(error)
+            return result
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if future.cancel():
+                with self._stats_lock:
+                    self.stats.queue_depth -= 1
+                    self.stats.cancelled += 1
+                record_call_error(SheetsApiError(None, 'cancelled in the executor queue', not_sent=True))
+            else:
+                with self._stats_lock:
+                    self.stats.abandoned += 1
+                # the request is on its way, a write may still be applied
+                record_call_error(SheetsApiError(None, 'abandoned in the executor'))
+                future.add_done_callback(
+                    lambda _: logger.warning(f'Abandoned sheets call {func.__name__} finished, the result is discarded')
+                )
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            with self._stats_lock:
+                self.stats.timeouts += 1
+            logger.warning(f'Sheets call {func.__name__} timed out after {self.call_timeout}s, '
+                           f'executor stats: {self.stats.dict()}')
+            return default
+
+    async def get_range(self, spreadsheet_id: str, sheet_name: str, sheet_range: str) -> list[str]:
+        return await self._run([], self.service.get_range, spreadsheet_id, sheet_name, sheet_range)
+
+    async def get_ranges(self, spreadsheet_id: str, ranges: list[tuple[str, str]]) -> list[list[str]]:
+        return await self._run([], self.service.get_ranges, spreadsheet_id, ranges)
+
+    async def update_one(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+    ) -> bool:
+        return await self._run(
+            False, self.service.update_one, spreadsheet_id, sheet_name, sheet_range, data,
+        )
+
+    async def update_many(
+        self,
+        spreadsheet_id: str,
+        data: dict[str, dict[str, list[list[str]]]],
+    ) -> bool:
+        return await self._run(False, self.service.update_many, spreadsheet_id, data)
+
+    async def append(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+        return_row_id: bool = False,
+    ) -> bool | int:
+        return await self._run(
+            False,
+            self.service.append,
+            spreadsheet_id,
+            sheet_name,
+            sheet_range,
+            data,
+            return_row_id=return_row_id,
+        )
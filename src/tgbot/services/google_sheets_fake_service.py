@@ -0,0 +1,365 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from datetime import date, timedelta
+from typing import Callable, TYPE_CHECKING
+
+from .google_sheets_api_service import parse_row_from_range
+from .google_sheets_async_api_service import AbstractSheetsService
+from .google_sheets_resilience import SheetsApiError, SheetsCallPolicy, CircuitOpenError
+from .repostiories.google_repository import SpreadsheetBool
+from .sheet_ranges import column_index, column_letters, parse_a1_range
+from .work_time import DATE_FORMAT, parse_date, parse_duration, format_duration, work_plan_seconds
+
+if TYPE_CHECKING:
+    # config imports services.codecs, a runtime import here would be circular
+    from config import GoogleRepositoryConfig
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyModel:
+    """
+    Latency distribution from a spec: `fixed:<ms>`, `uniform:<min_ms>,<max_ms>`,
+    `normal:<mean_ms>,<stddev_ms>` or `lognormal:<median_ms>,<sigma>`.
+    """
+
+    def __init__(self, spec: str, rnd: random.Random):
+        kind, _, params = spec.partition(':')
+        self.kind = kind.strip()
+        self.params = [float(p) for p in params.split(',') if p.strip()]
+        self.rnd = rnd
+        samplers: dict[str, Callable[[], float]] = {
+            'fixed': lambda: self.params[0],
+            'uniform': lambda: self.rnd.uniform(self.params[0], self.params[1]),
+            'normal': lambda: self.rnd.gauss(self.params[0], self.params[1]),
+            'lognormal': lambda: self.params[0] * self.rnd.lognormvariate(0, self.params[1]),
+        }
+        if self.kind not in samplers:
+            raise ValueError(f'Unknown latency distribution: {spec}')
+        self._sampler = samplers[self.kind]
+
+    def sample(self) -> float:
+        return max(0.0, self._sampler()) / 1000
+
+
+@dataclass
+class FakeSheetsStats:
+    reads: int = 0
+    writes: int = 0
+    quota_errors: int = 0
+    outage_errors: int = 0
+
+    dict = asdict
+
+
+class FakeGoogleSheetsService(AbstractSheetsService):
+    """
+    In-memory stand-in for Google Sheets with the same surface as the real services.
+
+    Keeps every sheet as a grid of strings, evaluates the "Отчеты для бота" filter
+    view (rows and plan/fact/net totals) from the reports sheet on every read of
+    the view sheet, and emulates latency, per-minute quota (429) and outages (503).
+    Errors go through the same SheetsCallPolicy as the real transports.
+    """
+
+    def __init__(
+        self,
+        repository_config: 'GoogleRepositoryConfig',
+        latency: str = 'fixed:0',
+        read_quota_per_minute: int = 0,
+        write_quota_per_minute: int = 0,
+        quota_error_rate: float = 0,
+        outage_rate: float = 0,
+        outage_seconds: float = 30,
+        work_day_hours: float = 8,
+        seed: int | None = None,
+        policy: SheetsCallPolicy | None = None,
+    ):
+        self.config = repository_config
+        self.rnd = random.Random(seed)
+        self.latency = LatencyModel(latency, self.rnd)
+        self.read_quota_per_minute = read_quota_per_minute
+        self.write_quota_per_minute = write_quota_per_minute
+        self.quota_error_rate = quota_error_rate
+        self.outage_rate = outage_rate
+        self.outage_seconds = outage_seconds
+        self.work_day_hours = work_day_hours
+        self.policy = policy or SheetsCallPolicy()
+        self.stats = FakeSheetsStats()
+        self.sheets: dict[str, list[list[str]]] = {}
+        self._calls: dict[str, deque[float]] = {'read': deque(), 'write': deque()}
+        self._outage_until = 0.0
+
+    def seed_synthetic(
+        self,
+        users: int = 30,
+        work_types: int = 15,
+        clients: int = 200,
+        reports: int = 5000,
+        days: int = 90,
+    ) -> None:
+        cfg = self.config
+        users_rows = [
+            [f'Сотрудник {i}', f'Должность {i % 5}', str(1000 + i),
+             SpreadsheetBool.yes if i == 0 else SpreadsheetBool.no, SpreadsheetBool.yes]
+            for i in range(users)
+        ]
+        work_types_rows = [[f'Вид работы {i}'] for i in range(work_types)]
+        clients_rows = [
+            [f'Клиент {i:04d}', SpreadsheetBool.yes if self.rnd.random() < 0.1 else SpreadsheetBool.no]
+            for i in range(clients)
+        ]
+        self.write(cfg.users_sheet_name, cfg.users_sheet_range, users_rows)
+        self.write(cfg.work_types_sheet_name, cfg.work_types_sheet_range, work_types_rows)
+        self.write(cfg.clients_sheet_name, cfg.clients_sheet_range, clients_rows)
+
+        today = date.today()
+        report_rows = []
+        for _ in range(reports):
+            user = self.rnd.choice(users_rows)
+            report_rows.append([
+                (today - timedelta(days=self.rnd.randrange(days))).strftime(DATE_FORMAT),
+                user[2],
+                user[0],
+                user[1],
+                self.rnd.choice(work_types_rows)[0],
+                self.rnd.choice(clients_rows)[0],
+                format_duration(self.rnd.randrange(1, 17) * 15 * 60)[:5],
+                '-',
+            ])
+        self._append_reports(report_rows)
+        remove_col = column_index(cfg.work_time_report_remove_col)
+        for row in self.sheets[cfg.work_time_report_sheet_name]:
+            if row and self.rnd.random() < 0.02:
+                self._set_cell(row, remove_col, SpreadsheetBool.yes)
+        logger.warning(f'Fake sheets seeded: {users} users (codes {users_rows[0][2]}..'
+                       f'{users_rows[-1][2]}, {users_rows[0][2]} is admin), {work_types} work types, '
+                       f'{clients} clients, {reports} reports')
+
+    def read(self, sheet_name: str, sheet_range: str) -> list[list[str]]:
+        if sheet_name == self.config.wtrs_sheet_name:
+            self._evaluate_report_view()
+        grid = self.sheets.get(sheet_name, [])
+        start_col, start_row, end_col, end_row = parse_a1_range(sheet_range)
+        end_row = len(grid) - 1 if end_row is None else min(end_row, len(grid) - 1)
+        values = []
+        for row in grid[start_row:end_row + 1]:
+            cells = row[start_col:end_col + 1]
+            while cells and cells[-1] == '':
+                cells.pop()
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def write(self, sheet_name: str, sheet_range: str, values: list[list[str]]) -> None:
+        grid = self.sheets.setdefault(sheet_name, [])
+        start_col, start_row, _, _ = parse_a1_range(sheet_range)
+        for i, row_values in enumerate(values):
+            while len(grid) <= start_row + i:
+                grid.append([])
+            for j, value in enumerate(row_values):
+                self._set_cell(grid[start_row + i], start_col + j, '' if value is None else str(value))
+
+    def append_rows(self, sheet_name: str, sheet_range: str, values: list[list[str]]) -> str:
+        grid = self.sheets.setdefault(sheet_name, [])
+        start_col, start_row, end_col, _ = parse_a1_range(sheet_range)
+        first_row = start_row
+        for i in range(len(grid) - 1, start_row - 1, -1):
+            if any(grid[i][start_col:end_col + 1]):
+                first_row = i + 1
+                break
+        self.write(sheet_name, f'{column_letters(start_col)}{first_row + 1}', values)
+        if sheet_name == self.config.work_time_report_sheet_name:
+            self._fill_report_row_ids(first_row, len(values))
+        last_col = start_col + max(len(row) for row in values) - 1
+        return (f'{sheet_name}!{column_letters(start_col)}{first_row + 1}:'
+                f'{column_letters(last_col)}{first_row + len(values)}')
+
+    def _append_reports(self, rows: list[list[str]]) -> None:
+        self.append_rows(self.config.work_time_report_sheet_name, self.config.work_time_report_sheet_range, rows)
+
+    def _fill_report_row_ids(self, first_row: int, count: int) -> None:
+        # emulates the =ROW() column next to the report data
+        grid = self.sheets[self.config.work_time_report_sheet_name]
+        _, _, end_col, _ = parse_a1_range(self.config.work_time_report_sheet_range)
+        for row in range(first_row, first_row + count):
+            self._set_cell(grid[row], end_col + 1, str(row + 1))
+
+    @staticmethod
+    def _set_cell(row: list[str], col: int, value: str) -> None:
+        while len(row) <= col:
+            row.append('')
+        row[col] = value
+
+    def _get_cell(self, sheet_name: str, cell: str) -> str:
+        grid = self.sheets.get(sheet_name, [])
+        col, row, _, _ = parse_a1_range(cell)
+        return grid[row][col] if row < len(grid) and col < len(grid[row]) else ''
+
+    def _evaluate_report_view(self) -> None:
+        cfg = self.config
+        date_from = parse_date(self._get_cell(cfg.wtrs_sheet_name, cfg.wtrs_date_from_cell))
+        date_to = parse_date(self._get_cell(cfg.wtrs_sheet_name, cfg.wtrs_date_to_cell))
+        user_id = self._get_cell(cfg.wtrs_sheet_name, cfg.wtrs_user_cell).strip()
+        client = self._get_cell(cfg.wtrs_sheet_name, cfg.wtrs_client_cell).strip()
+
+        _, source_start, _, _ = parse_a1_range(cfg.work_time_report_sheet_range)
+        remove_col = column_index(cfg.work_time_report_remove_col)
+        source = self.sheets.get(cfg.work_time_report_sheet_name, [])
+        rows = []
+        fact = 0
+        first_date = None
+        for row_number, row in enumerate(source[source_start:], source_start + 1):
+            cells = (row + [''] * 8)[:8]
+            if not any(cells):
+                continue
+            if len(row) > remove_col and row[remove_col] == SpreadsheetBool.yes:
+                continue
+            report_date = parse_date(cells[0])
+            if date_from and (report_date is None or report_date < date_from):
+                continue
+            if date_to and (report_date is None or report_date > date_to):
+                continue
+            if user_id and cells[1].strip() != user_id:
+                continue
+            if client and cells[5].strip() != client:
+                continue
+            rows.append(cells + [str(row_number)])
+            fact += parse_duration(cells[6]) or 0
+            if report_date and (first_date is None or report_date < first_date):
+                first_date = report_date
+
+        plan = 0
+        if date_from or date_to:
+            plan_from = date_from or first_date or date_to
+            plan = work_plan_seconds(plan_from, date_to or date.today(), self.work_day_hours)
+
+        view = self.sheets.setdefault(cfg.wtrs_sheet_name, [])
+        _, view_start, _, _ = parse_a1_range(cfg.wtrs_sheet_range)
+        del view[view_start:]
+        self.write(cfg.wtrs_sheet_name, cfg.wtrs_sheet_range, rows)
+        self.write(cfg.wtrs_sheet_name, cfg.wtrs_time_plan_cell, [[format_duration(plan)]])
+        self.write(cfg.wtrs_sheet_name, cfg.wtrs_time_fact_cell, [[format_duration(fact)]])
+        self.write(cfg.wtrs_sheet_name, cfg.wtrs_time_net_cell, [[format_duration(fact - plan)]])
+
+    def _check_quota(self, kind: str, limit: int) -> None:
+        now = time.monotonic()
+        calls = self._calls[kind]
+        while calls and now - calls[0] >= 60:
+            calls.popleft()
+        if limit and len(calls) >= limit:
+            self.stats.quota_errors += 1
+            raise SheetsApiError(429, f'Quota exceeded for {kind} requests per minute')
+        calls.append(now)
+
+    async def _call(self, kind: str, operation: Callable):
+        await asyncio.sleep(self.latency.sample())
+        now = time.monotonic()
+        if now < self._outage_until or (self.outage_rate and self.rnd.random() < self.outage_rate):
+            if now >= self._outage_until:
+                self._outage_until = now + self.outage_seconds
+                logger.warning(f'Fake sheets outage for {self.outage_seconds}s')
+            self.stats.outage_errors += 1
+            raise SheetsApiError(503, 'The service is currently unavailable')
+        if self.quota_error_rate and self.rnd.random() < self.quota_error_rate:
+            self.stats.quota_errors += 1
+            raise SheetsApiError(429, 'Quota exceeded')
+        if kind == 'read':
+            self._check_quota(kind, self.read_quota_per_minute)
+            self.stats.reads += 1
+        else:
+            self._check_quota(kind, self.write_quota_per_minute)
+            self.stats.writes += 1
+        return operation()
+
+    async def _request(self, spreadsheet_id: str, kind: str, operation: Callable, idempotent: bool = True):
+        return await self.policy.call(spreadsheet_id, lambda: self._call(kind, operation), idempotent)
+
+    async def get_range(self, spreadsheet_id: str, sheet_name: str, sheet_range: str) -> list[str]:
+        try:
+            return await self._request(spreadsheet_id, 'read', lambda: self.read(sheet_name, sheet_range))
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return []
+        except Exception as exc:
+            logger.exception(exc)
+            return []
+
+    async def get_ranges(self, spreadsheet_id: str, ranges: list[tuple[str, str]]) -> list[list[str]]:
+        def operation():
+            return [
+                [v for v in self.read(sheet_name, sheet_range) if v != []]
+                for sheet_name, sheet_range in ranges
+            ]
+        try:
+            return await self._request(spreadsheet_id, 'read', operation)
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return []
+        except Exception as exc:
+            logger.exception(exc)
+            return []
+
+    async def update_one(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+    ) -> bool:
+        try:
+            # the real services send `data` as a single row
+            await self._request(spreadsheet_id, 'write', lambda: self.write(sheet_name, sheet_range, [data]))
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return False
+        except Exception as exc:
+            logger.exception(exc)
+            return False
+        return True
+
+    async def update_many(
+        self,
+        spreadsheet_id: str,
+        data: dict[str, dict[str, list[list[str]]]],
+    ) -> bool:
+        def operation():
+            for sheet_name, sheet_data in data.items():
+                for sheet_range, sheet_values in sheet_data.items():
+                    self.write(sheet_name, sheet_range, sheet_values)
+        try:
+            await self._request(spreadsheet_id, 'write', operation)
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return False
+        except Exception as exc:
+            logger.exception(exc)
+            return False
+        return True
+
+    async def append(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+        return_row_id: bool = False,
+    ) -> bool | int:
+        try:
+            updated_range = await self._request(
+                spreadsheet_id, 'write', lambda: self.append_rows(sheet_name, sheet_range, data), idempotent=False,
+            )
+            if return_row_id:
+                return parse_row_from_range(updated_range)
+        except CircuitOpenError as exc:
+            logger.warning(exc)
+            return False
+        except Exception as exc:
+            logger.exception(exc)
+            return False
+        return True
@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from enum import StrEnum
+from typing import Awaitable, Callable, Iterator, TypeVar
+
+import aiohttp
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class SheetsApiError(Exception):
+    def __init__(self, status: int | None, message: str = '', not_sent: bool = False):
+        super().__init__(f'Sheets API error {status}: {message}')
+        self.status = status
+        self.not_sent = not_sent
+
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status == 429 or self.status >= 500
+
+    @property
+    def not_applied(self) -> bool:
+        """The request surely had no effect, so even a non-idempotent call may be resent."""
+        # a 4xx response (429 included) means the request was rejected
+        return self.not_sent or self.status is not None and 400 <= self.status < 500
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class SheetsCallOutcome:
+    """The error of the last failed Sheets call made inside `track_sheets_calls`."""
+
+    def __init__(self):
+        self.error: SheetsApiError | None = None
+
+    @property
+    def not_applied(self) -> bool:
+        return self.error is not None and self.error.not_applied
+
+
+sheets_call_outcome: ContextVar[SheetsCallOutcome | None] = ContextVar('sheets_call_outcome', default=None)
+
+
+@contextmanager
+def track_sheets_calls() -> Iterator[SheetsCallOutcome]:
+    """
+    The transports swallow errors and return a default value, this tells the caller
+    whether a failed write may still have been applied.
+    """
+    outcome = SheetsCallOutcome()
+    token = sheets_call_outcome.set(outcome)
+    try:
+        yield outcome
+    finally:
+        sheets_call_outcome.reset(token)
+
+
+def record_call_error(error: SheetsApiError) -> None:
+    outcome = sheets_call_outcome.get()
+    if outcome is not None:
+        outcome.error = error
+
+
+def classify_error(exc: Exception) -> SheetsApiError | None:
+    """
+    Maps transport exceptions to SheetsApiError, status None means a timeout or
+    a connection problem. Returns None for errors that are not API errors at all.
+    """
+    if isinstance(exc, SheetsApiError):
+        return exc
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return SheetsApiError(exc.status, exc.message)
+    if isinstance(exc, HttpError):
+        return SheetsApiError(exc.resp.status, exc.reason)
+    if isinstance(exc, (aiohttp.ClientConnectorError, ConnectionRefusedError)):
+        # the connection was never established, the request did not leave the client
+        return SheetsApiError(None, repr(exc), not_sent=True)
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, aiohttp.ClientConnectionError, ConnectionError)):
+        return SheetsApiError(None, repr(exc))
+    return None
+
+
+class BreakerState(StrEnum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == BreakerState.CLOSED:
+                return True
+            if self.state == BreakerState.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # let a single probe through
+                self.state = BreakerState.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = BreakerState.CLOSED
+            self.failures = 0
+
+    def release_probe(self) -> None:
+        """The probe ended without a verdict, let the next call probe again."""
+        with self._lock:
+            if self.state == BreakerState.HALF_OPEN:
+                self.state = BreakerState.OPEN
+                self.opened_at = time.monotonic() - self.reset_timeout
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == BreakerState.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = BreakerState.OPEN
+                self.opened_at = time.monotonic()
+
+
+@dataclass
+class ResilienceStats:
+    calls: int = 0
+    retries: int = 0
+    failures: int = 0
+    short_circuits: int = 0
+    breakers_open: int = 0
+
+    dict = asdict
+
+
+class SheetsCallPolicy:
+    """
+    Retries transient Sheets errors (429, 5xx, timeouts) with exponential backoff
+    and full jitter, and keeps a circuit breaker per spreadsheet.
+
+    Non-idempotent calls (append) are retried only when the error proves the
+    request was not applied, a 5xx or a timeout may hide a written row.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 8,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.stats = ResilienceStats()
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get_breaker(self, spreadsheet_id: str) -> CircuitBreaker:
+        breaker = self._breakers.get(spreadsheet_id)
+        if breaker is None:
+            breaker = self._breakers.setdefault(
+                spreadsheet_id, CircuitBreaker(self.failure_threshold, self.reset_timeout),
+            )
+        return breaker
+
+    def is_open(self, spreadsheet_id: str) -> bool:
+        return self.get_breaker(spreadsheet_id).state != BreakerState.CLOSED
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _before_call(self, spreadsheet_id: str) -> CircuitBreaker:
+        breaker = self.get_breaker(spreadsheet_id)
+        if not breaker.allow():
+            self.stats.short_circuits += 1
+            record_call_error(SheetsApiError(None, 'circuit breaker is open', not_sent=True))
+            raise CircuitOpenError(f'Circuit breaker is open for spreadsheet {spreadsheet_id}')
+        self.stats.calls += 1
+        return breaker
+
+    def _on_error(
+        self,
+        breaker: CircuitBreaker,
+        exc: Exception,
+        attempt: int,
+        idempotent: bool,
+    ) -> float | None:
+        """Returns a delay before the next attempt or None if the error must be raised."""
+        error = classify_error(exc)
+        if error is None or not error.retryable:
+            # not a transient failure, it says nothing about the spreadsheet health
+            breaker.release_probe()
+            record_call_error(error or SheetsApiError(None, repr(exc)))
+            return None
+        if (
+            attempt >= self.max_attempts
+            or breaker.state == BreakerState.HALF_OPEN
+            or not (idempotent or error.not_applied)
+        ):
+            self.stats.failures += 1
+            record_call_error(error)
+            breaker.record_failure()
+            if breaker.state == BreakerState.OPEN:
+                self.stats.breakers_open += 1
+                logger.warning(f'Sheets circuit breaker opened after {breaker.failures} failures')
+            return None
+        self.stats.retries += 1
+        delay = self._backoff(attempt)
+        logger.info(f'Sheets call failed ({error}), retry {attempt}/{self.max_attempts - 1} in {delay:.2f}s')
+        return delay
+
+    async def call(self, spreadsheet_id: str, func: Callable[[], Awaitable[T]], idempotent: bool = True) -> T:
+        breaker = self._before_call(spreadsheet_id)
+        attempt = 1
+        while True:
+            try:
+                result = await func()
+            except Exception as exc:
+                delay = self._on_error(breaker, exc, attempt, idempotent)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            breaker.record_success()
+            return result
+
+    def call_sync(self, spreadsheet_id: str, func: Callable[[], T], idempotent: bool = True) -> T:
+        breaker = self._before_call(spreadsheet_id)
+        attempt = 1
+        while True:
+            try:
+                result = func()
+            except Exception as exc:
+                delay = self._on_error(breaker, exc, attempt, idempotent)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            breaker.record_success()
+            return result
@@ -0,0 +1,198 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from enum import IntEnum, StrEnum
+
+from .google_sheets_async_api_service import AbstractSheetsService
+
+logger = logging.getLogger(__name__)
+
+
+class SheetsPriority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class QuotaKind(StrEnum):
+    READ = 'read'
+    WRITE = 'write'
+
+
+sheets_priority: ContextVar[SheetsPriority] = ContextVar(
+    'sheets_priority', default=SheetsPriority.INTERACTIVE,
+)
+
+
+@contextmanager
+def background_priority():
+    token = sheets_priority.set(SheetsPriority.BACKGROUND)
+    try:
+        yield
+    finally:
+        sheets_priority.reset(token)
+
+
+@dataclass
+class QuotaStats:
+    immediate: int = 0
+    queued_interactive: int = 0
+    queued_background: int = 0
+    queue_depth: int = 0
+    queue_depth_max: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+
+    dict = asdict
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def time_to_token(self) -> float:
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class QuotaScheduler:
+    """
+    Token bucket with a priority queue of waiters: calls over budget are queued
+    instead of failed, and interactive calls are granted before background ones.
+    A zero quota means unlimited, every call is granted at once.
+    """
+
+    def __init__(self, kind: QuotaKind, per_minute: int):
+        self.kind = kind
+        self.bucket = TokenBucket(per_minute) if per_minute > 0 else None
+        self.stats = QuotaStats()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+
+    async def acquire(self, priority: SheetsPriority) -> None:
+        if self.bucket is None or not self._waiters and self.bucket.try_take():
+            self.stats.immediate += 1
+            return
+
+        if priority == SheetsPriority.INTERACTIVE:
+            self.stats.queued_interactive += 1
+        else:
+            self.stats.queued_background += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self.stats.queue_depth = len(self._waiters)
+        self.stats.queue_depth_max = max(self.stats.queue_depth_max, self.stats.queue_depth)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        queued_at = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self._remove_waiter(future)
+            else:
+                # granted right before the cancellation, the token is unused
+                self.bucket.tokens += 1
+            raise
+        wait_time = time.monotonic() - queued_at
+        self.stats.wait_time_total += wait_time
+        self.stats.wait_time_max = max(self.stats.wait_time_max, wait_time)
+        if wait_time > 1:
+            logger.info(f'Sheets {self.kind} call waited {wait_time:.1f}s for quota')
+
+    def _remove_waiter(self, future: asyncio.Future) -> None:
+        self._waiters = [waiter for waiter in self._waiters if waiter[2] is not future]
+        heapq.heapify(self._waiters)
+        self.stats.queue_depth = len(self._waiters)
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            delay = self.bucket.time_to_token()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self.bucket.try_take():
+                continue
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    future.set_result(None)
+                    break
+            else:
+                # every waiter was cancelled, give the token back
+                self.bucket.tokens += 1
+            self.stats.queue_depth = len(self._waiters)
+
+
+class ScheduledSheetsService(AbstractSheetsService):
+    def __init__(
+        self,
+        service: AbstractSheetsService,
+        read_quota_per_minute: int = 60,
+        write_quota_per_minute: int = 60,
+    ):
+        self.service = service
+        self.read_quota = QuotaScheduler(QuotaKind.READ, read_quota_per_minute)
+        self.write_quota = QuotaScheduler(QuotaKind.WRITE, write_quota_per_minute)
+
+    async def close(self) -> None:
+        await self.service.close()
+
+    async def get_range(self, spreadsheet_id: str, sheet_name: str, sheet_range: str) -> list[str]:
+        await self.read_quota.acquire(sheets_priority.get())
+        return await self.service.get_range(spreadsheet_id, sheet_name, sheet_range)
+
+    async def get_ranges(self, spreadsheet_id: str, ranges: list[tuple[str, str]]) -> list[list[str]]:
+        await self.read_quota.acquire(sheets_priority.get())
+        return await self.service.get_ranges(spreadsheet_id, ranges)
+
+    async def update_one(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+    ) -> bool:
+        await self.write_quota.acquire(sheets_priority.get())
+        return await self.service.update_one(spreadsheet_id, sheet_name, sheet_range, data)
+
+    async def update_many(
+        self,
+        spreadsheet_id: str,
+        data: dict[str, dict[str, list[list[str]]]],
+    ) -> bool:
+        await self.write_quota.acquire(sheets_priority.get())
+        return await self.service.update_many(spreadsheet_id, data)
+
+    async def append(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        sheet_range: str,
+        data: list[list[str]],
+        return_row_id: bool = False,
+    ) -> bool | int:
+        await self.write_quota.acquire(sheets_priority.get())
+        return await self.service.append(
+            spreadsheet_id, sheet_name, sheet_range, data, return_row_id=return_row_id,
+        )
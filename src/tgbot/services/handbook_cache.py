@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, TypeVar
+
+from .constants import RedisKeys
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+@dataclass
+class HandbookCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    bytes_saved: int = 0
+
+    def dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {**asdict(self), 'hit_ratio': round(self.hits / lookups, 3) if lookups else 0}
+
+
+@dataclass
+class _Entry:
+    version: int
+    items: tuple
+    size: int
+    # monotonic deadline of the Redis key, None if it does not expire
+    expires_at: float | None = None
+    indexes: dict[str, Any] = field(default_factory=dict)
+
+
+class HandbookCache:
+    """
+    Process-local cache of decoded handbooks in front of Redis.
+
+    Entries are immutable tuples tagged with the handbook version, a counter that
+    GoogleRepository increments after every handbook write. The version is
+    broadcast through Redis pub/sub, so every bot process drops its entries
+    without polling. While the subscription is down the version is read from
+    Redis on every lookup, which is still much cheaper than the handbook itself.
+    An entry also expires with the Redis key it was read from, so the handbook
+    TTLs apply even when nothing bumps the version.
+
+    Other process-local caches share the channel: `publish` sends a
+    `<prefix>:<payload>` message that `listen` routes to the handler added
+    for the prefix.
+    """
+
+    _version_key = RedisKeys.HANDBOOK_VERSION_KEY
+    _channel = RedisKeys.HANDBOOK_INVALIDATION_CHANNEL
+
+    def __init__(self, storage: Storage, reconnect_delay: float = 5):
+        self.storage = storage
+        self.reconnect_delay = reconnect_delay
+        self.stats = HandbookCacheStats()
+        self._entries: dict[str, _Entry] = {}
+        self._version: int | None = None
+        self._listening = False
+        self._handlers: dict[str, Callable[[str], None]] = {}
+
+    async def get_version(self) -> int:
+        if self._listening and self._version is not None:
+            return self._version
+        version = int(await self.storage.redis.get(self._version_key) or 0)
+        self._set_version(version)
+        return version
+
+    async def get(self, key: str, factory: Callable[[dict], T]) -> tuple[T, ...] | None:
+        """Returns the handbook stored under `key` built with `factory`, None if it is not in Redis."""
+        version = await self.get_version()
+        entry = self._entries.get(key)
+        if (entry is not None and entry.version == version
+                and (entry.expires_at is None or time.monotonic() < entry.expires_at)):
+            self.stats.hits += 1
+            self.stats.bytes_saved += entry.size
+            return entry.items
+
+        self.stats.misses += 1
+        raw, ttl_ms = await self.storage.get_raw_data_with_ttl(keys=[key])
+        if raw is None:
+            self._entries.pop(key, None)
+            return None
+        items = []
+        for item in self.storage.decode_data(raw).get(key, []):
+            try:
+                items.append(factory(item))
+            except Exception as exc:
+                logger.exception(exc)
+        entry = _Entry(
+            version=version,
+            items=tuple(items),
+            size=len(raw),
+            expires_at=time.monotonic() + ttl_ms / 1000 if ttl_ms is not None else None,
+        )
+        self._entries[key] = entry
+        return entry.items
+
+    async def get_index(
+        self,
+        key: str,
+        factory: Callable[[dict], T],
+        name: str,
+        build: Callable[[tuple[T, ...]], Any],
+    ) -> Any | None:
+        """Returns a lookup structure derived from the handbook, built once per handbook version."""
+        items = await self.get(key, factory)
+        if items is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry.items is not items:
+            # invalidated while loading, serve without caching the index
+            return build(items)
+        if name not in entry.indexes:
+            entry.indexes[name] = build(items)
+        return entry.indexes[name]
+
+    async def bump(self) -> int:
+        """Marks handbooks as changed, must be called after the new data is written."""
+        version = await self.storage.redis.incr(self._version_key)
+        await self.storage.redis.publish(self._channel, version)
+        self._set_version(version)
+        return version
+
+    def add_handler(self, prefix: str, handler: Callable[[str], None]) -> None:
+        self._handlers[prefix] = handler
+
+    async def publish(self, prefix: str, payload: Any) -> None:
+        await self.storage.redis.publish(self._channel, f'{prefix}:{payload}')
+
+    def _on_message(self, data: bytes | str) -> None:
+        if isinstance(data, bytes):
+            data = data.decode()
+        prefix, separator, payload = data.partition(':')
+        if not separator:
+            self._set_version(int(data))
+        elif prefix in self._handlers:
+            self._handlers[prefix](payload)
+
+    def _set_version(self, version: int) -> None:
+        if version == self._version:
+            return
+        if self._version is not None:
+            self.stats.invalidations += 1
+        self._version = version
+        self._entries.clear()
+
+    async def listen(self):
+        while True:
+            try:
+                async with self.storage.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self._channel)
+                    # bumps made before the subscription are not delivered
+                    self._set_version(int(await self.storage.redis.get(self._version_key) or 0))
+                    self._listening = True
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self._on_message(message['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception(exc)
+            finally:
+                self._listening = False
+            await asyncio.sleep(self.reconnect_delay)
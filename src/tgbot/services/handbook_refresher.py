@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+
+from .google_sheets_scheduler import background_priority
+from .repostiories.google_repository import GoogleRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HandbookRefresherStats:
+    refreshes: int = 0
+    failures: int = 0
+    last_duration: float = 0
+
+    dict = asdict
+
+
+class HandbookRefresher:
+    """
+    Reloads users, work types and clients ahead of expiration, so interactive
+    requests read warm handbooks and never wait for a Sheets batchGet.
+
+    Every handbook has its own interval, handbooks due at the same time are
+    fetched with one call.
+    """
+
+    def __init__(
+        self,
+        google_repository: GoogleRepository,
+        intervals: dict[str, float],
+        retry_delay: float = 5,
+    ):
+        self.google_repository = google_repository
+        self.intervals = intervals
+        self.retry_delay = retry_delay
+        self.stats = HandbookRefresherStats()
+
+    async def run(self):
+        next_refresh = {key: 0.0 for key in self.intervals}
+        # a task of its own, the priority does not leak to interactive calls
+        with background_priority():
+            while True:
+                now = time.monotonic()
+                due = [key for key, at in next_refresh.items() if at <= now]
+                if not due:
+                    await asyncio.sleep(min(next_refresh.values()) - now)
+                    continue
+                try:
+                    await self.google_repository.update_handbooks_data(due)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    self.stats.failures += 1
+                    logger.exception(exc)
+                    for key in due:
+                        next_refresh[key] = now + self.retry_delay
+                    continue
+                self.stats.refreshes += 1
+                self.stats.last_duration = time.monotonic() - now
+                for key in due:
+                    next_refresh[key] = now + self.intervals[key]
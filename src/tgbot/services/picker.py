@@ -0,0 +1,129 @@
+import logging
+from enum import StrEnum
+
+from aiogram.filters.callback_data import CallbackData
+from cachetools import LRUCache
+
+from models import InlineButton, InlineKeyboardResponse, Response, ResponseType
+
+from .constants import Replies
+from .repostiories import Repository
+from .utils import AnswerCallback
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 8
+
+
+class PickerKind(StrEnum):
+    users = 'u'
+    clients = 'c'
+    work_types = 'w'
+
+
+class PickerCallback(CallbackData, prefix='picker'):
+    act: str
+    kind: PickerKind
+    version: int
+    page: int = 0
+    item: int = 0
+    skip: bool = False
+
+
+# (kind, version) -> item names, (kind, version, page, skip) -> rendered rows
+_cache: LRUCache = LRUCache(maxsize=512)
+
+
+async def _get_names(repository: Repository, kind: PickerKind) -> tuple[int, tuple[str, ...]]:
+    cache = repository.google_repository.handbook_cache
+    version = await cache.get_version()
+    names = _cache.get((kind, version))
+    if names is None:
+        if kind == PickerKind.users:
+            names = tuple(user.fullname for user in await repository.users.get_users())
+        elif kind == PickerKind.clients:
+            names = tuple(client.name for client in await repository.clients.get_clients(is_completed=False))
+        else:
+            names = tuple(work_type.name for work_type in await repository.work_types.get_work_types())
+        # a miss above reloads the handbook and bumps the version
+        version = await cache.get_version()
+        _cache[(kind, version)] = names
+    return version, names
+
+
+async def _get_page_rows(
+    repository: Repository,
+    kind: PickerKind,
+    page: int,
+    skip: bool,
+) -> tuple[int, list[list[InlineButton]]]:
+    version, names = await _get_names(repository, kind)
+    pages = max(1, -(-len(names) // PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
+    rows = _cache.get((kind, version, page, skip))
+    if rows is None:
+        first = page * PAGE_SIZE
+        rows = [
+            [InlineButton(
+                text=name,
+                callback_data=PickerCallback(act='PICK', kind=kind, version=version, item=first + i).pack(),
+            )]
+            for i, name in enumerate(names[first:first + PAGE_SIZE])
+        ]
+        if pages > 1:
+            rows.append([
+                InlineButton(
+                    text='<<',
+                    callback_data=PickerCallback(
+                        act='PAGE', kind=kind, version=version, page=page - 1, skip=skip,
+                    ).pack(),
+                ),
+                InlineButton(
+                    text=f'{page + 1}/{pages}',
+                    callback_data=PickerCallback(act='IGNORE', kind=kind, version=version).pack(),
+                ),
+                InlineButton(
+                    text='>>',
+                    callback_data=PickerCallback(
+                        act='PAGE', kind=kind, version=version, page=page + 1, skip=skip,
+                    ).pack(),
+                ),
+            ])
+        _cache[(kind, version, page, skip)] = rows
+    return page, rows
+
+
+async def create_picker_response(
+    repository: Repository,
+    kind: PickerKind,
+    messages: list[str],
+    page: int = 0,
+    skip: bool = False,
+    edit: bool = False,
+) -> Response:
+    """
+    One page of a handbook as an inline keyboard. Pages are rendered once per
+    handbook version, navigation buttons carry the skip flag to keep it on every page.
+    """
+    page, rows = await _get_page_rows(repository, kind, page, skip)
+    inlines = list(rows)
+    if kind == PickerKind.clients:
+        inlines.insert(0, [InlineButton(text=Replies.SEARCH_CLIENT_BUTTON, switch_inline_query_current_chat='')])
+    if skip:
+        inlines.append([InlineButton(text=Replies.SKIP, callback_data=AnswerCallback(text=Replies.SKIP).pack())])
+    return Response(
+        type=ResponseType.INLINE_KEYBOARD,
+        inline_keyboard_response=InlineKeyboardResponse(
+            messages=messages,
+            inlines=inlines,
+            edit_reply_keyboard=edit,
+        ),
+    )
+
+
+async def resolve_picked(repository: Repository, callback_data: PickerCallback) -> str | None:
+    """Name of the picked item, None if the handbook changed since the keyboard was sent."""
+    version, names = await _get_names(repository, callback_data.kind)
+    if version != callback_data.version or callback_data.item >= len(names):
+        return None
+    return names[callback_data.item]
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, asdict
+
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+class LockTimeoutError(Exception):
+    pass
+
+
+class LockLostError(Exception):
+    """The lease expired or was taken over while the lock was held."""
+
+
+# KEYS: lock, queue, heartbeats, sequence, fence
+# ARGV: token, lease_ms, now_ms, waiter_ttl_ms
+_ACQUIRE = """
+local dead = redis.call('zrangebyscore', KEYS[3], '-inf', ARGV[3] - ARGV[4])
+for _, token in ipairs(dead) do
+    redis.call('zrem', KEYS[2], token)
+    redis.call('zrem', KEYS[3], token)
+end
+if redis.call('zscore', KEYS[2], ARGV[1]) == false then
+    redis.call('zadd', KEYS[2], redis.call('incr', KEYS[4]), ARGV[1])
+end
+redis.call('zadd', KEYS[3], ARGV[3], ARGV[1])
+local head = redis.call('zrange', KEYS[2], 0, 0)[1]
+if head == ARGV[1] and redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    redis.call('zrem', KEYS[2], ARGV[1])
+    redis.call('zrem', KEYS[3], ARGV[1])
+    return redis.call('incr', KEYS[5])
+end
+return 0
+"""
+
+# KEYS: lock, queue, wake prefix ; ARGV: token, wake_ttl_ms
+_RELEASE = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('del', KEYS[1])
+local head = redis.call('zrange', KEYS[2], 0, 0)[1]
+if head then
+    local wake = KEYS[3] .. head
+    redis.call('rpush', wake, 1)
+    redis.call('pexpire', wake, ARGV[2])
+end
+return 1
+"""
+
+# KEYS: lock ; ARGV: token, lease_ms
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+@dataclass
+class RedisLockStats:
+    acquired: int = 0
+    timeouts: int = 0
+    lost: int = 0
+    wait_seconds: float = 0
+
+    dict = asdict
+
+
+class RedisLock:
+    """
+    Distributed mutex shared by all bot processes.
+
+    The lock key is taken with SET NX PX and holds a random token, only the owner
+    can release or renew it. Waiters line up in a FIFO queue (a sorted set ordered
+    by an INCR counter) and block on their own wake list, the release pushes to the
+    head waiter's list so it starts at once. Waiters refresh a heartbeat on every
+    attempt, a crashed waiter is dropped from the queue after `waiter_ttl_ms`.
+
+    Every acquisition increments a fencing counter, `check` fails if a newer
+    owner has taken the lock since, e.g. after the lease expired during a stall.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        name: str,
+        lease_ms: int = 30000,
+        waiter_ttl_ms: int = 5000,
+    ):
+        self.storage = storage
+        self.name = name
+        self.lease_ms = lease_ms
+        self.waiter_ttl_ms = waiter_ttl_ms
+        self.stats = RedisLockStats()
+        self._acquire = storage.redis.register_script(_ACQUIRE)
+        self._release = storage.redis.register_script(_RELEASE)
+        self._renew = storage.redis.register_script(_RENEW)
+
+    async def _key(self, *parts: str) -> str:
+        return await self.storage.build_key([self.name, *parts])
+
+    def __call__(self, timeout: float = 10) -> 'RedisLockHandle':
+        return RedisLockHandle(self, timeout)
+
+    async def acquire(self, timeout: float = 10) -> tuple[str, int]:
+        """Waits for the lock, returns the owner token and the fencing number."""
+        token = uuid.uuid4().hex
+        lock_key = await self._key()
+        queue_key = await self._key('queue')
+        heartbeats_key = await self._key('heartbeats')
+        keys = [lock_key, queue_key, heartbeats_key, await self._key('sequence'), await self._key('fence')]
+        wake_key = await self._key('wake', token)
+        started = time.monotonic()
+        deadline = started + timeout
+        try:
+            while True:
+                fence = await self._acquire(
+                    keys=keys,
+                    args=[token, self.lease_ms, int(time.time() * 1000), self.waiter_ttl_ms],
+                )
+                if fence:
+                    self.stats.acquired += 1
+                    self.stats.wait_seconds += time.monotonic() - started
+                    return token, int(fence)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats.timeouts += 1
+                    raise LockTimeoutError(self.name)
+                # whole seconds for BLPOP on Redis 5, the heartbeat must stay fresher than waiter_ttl_ms
+                wait = max(1, min(int(remaining), self.waiter_ttl_ms // 2000))
+                await self.storage.redis.blpop([wake_key], timeout=wait)
+        except BaseException:
+            await self.storage.redis.zrem(queue_key, token)
+            await self.storage.redis.zrem(heartbeats_key, token)
+            raise
+        finally:
+            await self.storage.redis.delete(wake_key)
+
+    async def release(self, token: str) -> bool:
+        keys = [await self._key(), await self._key('queue'), await self._key('wake', '')]
+        return bool(await self._release(keys=keys, args=[token, self.waiter_ttl_ms]))
+
+    async def renew(self, token: str) -> bool:
+        return bool(await self._renew(keys=[await self._key()], args=[token, self.lease_ms]))
+
+    async def check(self, fence: int) -> None:
+        """Raises LockLostError if a newer owner has taken the lock."""
+        current = await self.storage.redis.get(await self._key('fence'))
+        if current is None or int(current) != fence:
+            self.stats.lost += 1
+            raise LockLostError(self.name)
+
+
+class RedisLockHandle:
+    """`async with lock():` holds the lock for the block and renews the lease meanwhile."""
+
+    def __init__(self, lock: RedisLock, timeout: float):
+        self.lock = lock
+        self.timeout = timeout
+        self.token = None
+        self.fence = None
+        self._renewal = None
+
+    async def __aenter__(self) -> 'RedisLockHandle':
+        self.token, self.fence = await self.lock.acquire(self.timeout)
+        self._renewal = asyncio.create_task(self._renew())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        # a renewal still in flight could extend the lease after the release
+        self._renewal.cancel()
+        cancelled = False
+        try:
+            await self._renewal
+        except asyncio.CancelledError:
+            # the renewal's own cancellation, unless this task is being cancelled as well
+            cancelled = asyncio.current_task().cancelling() > 0
+        if not await self.lock.release(self.token):
+            logger.warning(f'Lock {self.lock.name} expired before release')
+        if cancelled:
+            raise asyncio.CancelledError
+
+    async def check(self) -> None:
+        await self.lock.check(self.fence)
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.lock.lease_ms / 3000)
+            try:
+                if not await self.lock.renew(self.token):
+                    logger.warning(f'Lock {self.lock.name} lease lost')
+                    return
+            except Exception as exc:
+                logger.exception(exc)
@@ -2,8 +2,9 @@ import logging
 
 from models import Client
 
+from services.client_search import ClientSearchCache, ClientSearchIndex
 from services.constants import RedisKeys
-from services.google_sheets_api_service import GoogleSheetsApiService
+from services.google_sheets_async_api_service import AbstractSheetsService
 from services.storage import Storage
 from .google_repository import GoogleRepository
 
@@ -16,23 +17,50 @@ class ClientRepository:
     def __init__(
         self,
         storage: Storage,
-        google_sheet_service: GoogleSheetsApiService,
+        google_sheet_service: AbstractSheetsService,
         google_repository: GoogleRepository,
     ):
         self.storage = storage
         self.google_sheet_service = google_sheet_service
         self.google_repository = google_repository
+        self.search_cache = ClientSearchCache()
 
-    async def get_clients(self, is_completed: bool | None = None) -> list[Client]:
-        clients = await self.storage.get_data(
-            keys=[self._clients_key],
-        )
+    async def get_clients(self, is_completed: bool | None = None) -> tuple[Client, ...]:
+        clients = await self.google_repository.handbook_cache.get(self._clients_key, _build_client)
+        if clients is None:
+            await self.google_repository.update_handbook(self._clients_key)
+            clients = await self.google_repository.handbook_cache.get(self._clients_key, _build_client)
         if not clients:
-            await self.google_repository.update_handbooks_data()
-            clients = await self.storage.get_data(keys=[self._clients_key])
-        if not clients:
-            return []
-        clients = [Client(**client) for client in clients[self._clients_key]]
+            return ()
         if is_completed is not None:
-            clients = list(filter(lambda x: x.completed == is_completed, clients))
+            clients = tuple(filter(lambda x: x.completed == is_completed, clients))
         return clients
+
+    async def get_client(self, name: str) -> Client | None:
+        """Not completed client by name, case and extra spaces are ignored."""
+        index = await self._get_search_index()
+        return index.get(name)
+
+    async def search(self, query: str, offset: int = 0, limit: int = 50) -> tuple[list[Client], int | None]:
+        """Not completed clients matching the query and the offset of the next page, if any."""
+        version = await self.google_repository.handbook_cache.get_version()
+        index = await self._get_search_index()
+        ids = self.search_cache.search(version, index, query)
+        next_offset = offset + limit if offset + limit < len(ids) else None
+        return [index.clients[i] for i in ids[offset:offset + limit]], next_offset
+
+    async def _get_search_index(self) -> ClientSearchIndex:
+        cache = self.google_repository.handbook_cache
+        index = await cache.get_index(self._clients_key, _build_client, 'search', _build_search_index)
+        if index is None:
+            await self.google_repository.update_handbook(self._clients_key)
+            index = await cache.get_index(self._clients_key, _build_client, 'search', _build_search_index)
+        return index or ClientSearchIndex(())
+
+
+def _build_client(client_dict: dict) -> Client:
+    return Client(**client_dict)
+
+
+def _build_search_index(clients: tuple[Client, ...]) -> ClientSearchIndex:
+    return ClientSearchIndex(tuple(client for client in clients if not client.completed))
@@ -1,12 +1,19 @@
-import asyncio
+import hashlib
+import json
 import logging
+from dataclasses import dataclass, replace
 from enum import StrEnum
+from typing import Any, Callable
 
 from models import User, WorkType, Client, Scenario, ScenarioStep, WorkTimeReport
 from models import WorkTimeReportStat
 from services.constants import RedisKeys
-from services.google_sheets_api_service import GoogleSheetsApiService
+from services.google_sheets_async_api_service import AbstractSheetsService
+from services.handbook_cache import HandbookCache
+from services.redis_lock import RedisLock, RedisLockHandle
+from services.sheet_ranges import column_index, column_letters, parse_a1_range
 from services.storage import Storage
+from services.work_time import query_work_time_reports
 
 logger = logging.getLogger(__name__)
 
@@ -15,27 +22,41 @@ class NotSetFilterError(Exception):
     pass
 
 
-class LockTimeoutError(Exception):
-    pass
-
-
 class SpreadsheetBool(StrEnum):
     yes = 'Да'
     no = 'Нет'
 
 
+@dataclass
+class Handbook:
+    key: str
+    sheet_name: str
+    sheet_range: str
+    expire_seconds: int
+    parse_row: Callable[[list[str]], Any]
+    sort_key: Callable[[Any], Any] | None = None
+
+
 class GoogleRepository:
     _user_list_key = RedisKeys.USERS_LIST_KEY
+    _user_key = RedisKeys.USER_KEY
+    _user_chats_key = RedisKeys.USER_CHATS_KEY
+    _scenario_key = RedisKeys.SCENARIO_KEY
     _work_types_key = RedisKeys.WORK_TYPES_KEY
     _clients_key = RedisKeys.CLIENTS_KEY
     _work_time_report_key = RedisKeys.WORK_TIME_REPORT_KEY
     _work_time_report_stat_key = RedisKeys.WORK_TIME_REPORT_STAT_KEY
     _work_time_report_lock_key = RedisKeys.WORK_TIME_REPORT_LOCK_KEY
+    _handbook_snapshot_key = RedisKeys.HANDBOOK_SNAPSHOT_KEY
+    _handbook_hash_key = RedisKeys.HANDBOOK_HASH_KEY
+    _work_time_report_mirror_key = RedisKeys.WORK_TIME_REPORT_MIRROR_KEY
+    _work_time_report_mirror_version_key = RedisKeys.WORK_TIME_REPORT_MIRROR_VERSION_KEY
+    _work_time_report_mirror_lock_key = RedisKeys.WORK_TIME_REPORT_MIRROR_LOCK_KEY
 
     def __init__(
         self,
         storage: Storage,
-        google_sheet_service: GoogleSheetsApiService,
+        google_sheet_service: AbstractSheetsService,
         spreadsheet_id: str,
         users_sheet_name: str,
         users_sheet_range: str,
@@ -56,6 +77,12 @@ class GoogleRepository:
         wtrs_time_plan_cell: str,
         wtrs_time_fact_cell: str,
         wtrs_time_net_cell: str,
+        handbook_cache: HandbookCache | None = None,
+        users_expire_seconds: int | None = None,
+        work_types_expire_seconds: int | None = None,
+        clients_expire_seconds: int | None = None,
+        local_reports: bool = False,
+        work_time_report_mirror_expire_seconds: int = 300,
     ):
         self.storage = storage
         self.google_sheet_service = google_sheet_service
@@ -79,7 +106,39 @@ class GoogleRepository:
         self.wtrs_time_plan_cell = wtrs_time_plan_cell
         self.wtrs_time_fact_cell = wtrs_time_fact_cell
         self.wtrs_time_net_cell = wtrs_time_net_cell
-        self._lock_attempt_count = 10
+        self.handbook_cache = handbook_cache or HandbookCache(storage)
+        self.handbooks = {
+            handbook.key: handbook for handbook in [
+                Handbook(
+                    key=self._user_list_key,
+                    sheet_name=users_sheet_name,
+                    sheet_range=users_sheet_range,
+                    expire_seconds=users_expire_seconds or handbook_expire_seconds,
+                    parse_row=self._parse_user_row,
+                ),
+                Handbook(
+                    key=self._work_types_key,
+                    sheet_name=work_types_sheet_name,
+                    sheet_range=work_types_sheet_range,
+                    expire_seconds=work_types_expire_seconds or handbook_expire_seconds,
+                    parse_row=self._parse_work_type_row,
+                ),
+                Handbook(
+                    key=self._clients_key,
+                    sheet_name=clients_sheet_name,
+                    sheet_range=clients_sheet_range,
+                    expire_seconds=clients_expire_seconds or handbook_expire_seconds,
+                    parse_row=self._parse_client_row,
+                    sort_key=lambda x: x.name.lower(),
+                ),
+            ]
+        }
+        self.work_time_report_lock = RedisLock(storage, self._work_time_report_lock_key)
+        self.work_time_report_mirror_lock = RedisLock(storage, self._work_time_report_mirror_lock_key)
+        self.local_reports = local_reports
+        self.work_time_report_mirror_expire_seconds = work_time_report_mirror_expire_seconds
+        # (version, reports) of the last mirror read by this process
+        self._work_time_report_mirror: tuple[int, tuple[WorkTimeReport, ...]] | None = None
 
     async def mark_report_removed(self, row_id: int) -> bool:
         cell = (f'{self.work_time_report_remove_col}{row_id}:'
@@ -89,10 +148,13 @@ class GoogleRepository:
                cell: [[SpreadsheetBool.yes]]
             }
         }
-        return self.google_sheet_service.update_many(
+        result = await self.google_sheet_service.update_many(
             spreadsheet_id=self.spreadsheet_id,
             data=update_data,
         )
+        if result and self.local_reports:
+            await self._patch_work_time_report_mirror(removed_row_id=row_id)
+        return result
 
     async def update_work_time_report_data(
         self,
@@ -102,7 +164,32 @@ class GoogleRepository:
         client: str | None = None,
         user_id: str | None = None,
     ):
-        await self._set_lock(self._work_time_report_lock_key)
+        if self.local_reports:
+            reports, stat = query_work_time_reports(
+                await self.get_work_time_report_mirror(),
+                report_from_date, report_to_date, client, user_id,
+            )
+        else:
+            reports, stat = await self._query_work_time_report_sheet(
+                user, report_from_date, report_to_date, client, user_id)
+
+        # reports and stats are read together, write them together
+        await self.storage.set_many([
+            ([self._work_time_report_key, user.chat_id],
+             {self._work_time_report_key: [report.dict() for report in reports]}),
+            ([self._work_time_report_stat_key, user.chat_id],
+             {self._work_time_report_stat_key: stat.dict()}),
+        ], expired=300)  # TODO: move to constants
+
+    async def _query_work_time_report_sheet(
+        self,
+        user: User,
+        report_from_date: str | None = None,
+        report_to_date: str | None = None,
+        client: str | None = None,
+        user_id: str | None = None,
+    ) -> tuple[list[WorkTimeReport], WorkTimeReportStat]:
+        """Sets the filter on the shared report sheet and reads the matched reports and totals."""
         client = '' if client is None else client
         report_from_date = '' if report_from_date is None else report_from_date
         report_to_date = '' if report_to_date is None else report_to_date
@@ -115,17 +202,6 @@ class GoogleRepository:
                 f'{self.wtrs_client_cell}:{self.wtrs_client_cell}': [[client]]
             }
         }
-
-        set_filter_result = self.google_sheet_service.update_many(
-            spreadsheet_id=self.spreadsheet_id,
-            data=update_data,
-        )
-        if not set_filter_result:
-            logger.warning(f'Error while setting filter for work time report '
-                           f'{user}, {report_date}, {client}')
-            await self._delete_lock(self._work_time_report_lock_key)
-            raise NotSetFilterError
-
         get_data = [
             (self.wtrs_sheet_name, self.wtrs_sheet_range,),
             (self.wtrs_sheet_name, f'{self.wtrs_time_plan_cell}:{self.wtrs_time_plan_cell}',),
@@ -133,13 +209,26 @@ class GoogleRepository:
             (self.wtrs_sheet_name, f'{self.wtrs_time_net_cell}:{self.wtrs_time_net_cell}',),
         ]
 
-        google_ranges = self.google_sheet_service.get_ranges(
-            spreadsheet_id=self.spreadsheet_id,
-            ranges=get_data,
-        )
+        # the filter cells are shared by all users, hold the lock from setting them to reading the result
+        async with self.work_time_report_lock() as lock:
+            set_filter_result = await self.google_sheet_service.update_many(
+                spreadsheet_id=self.spreadsheet_id,
+                data=update_data,
+            )
+            if not set_filter_result:
+                logger.warning(f'Error while setting filter for work time report '
+                               f'{user}, {report_from_date}, {report_to_date}, {client}')
+                raise NotSetFilterError
+
+            google_ranges = await self.google_sheet_service.get_ranges(
+                spreadsheet_id=self.spreadsheet_id,
+                ranges=get_data,
+            )
+            # the ranges belong to another filter if the lease expired and someone took the lock over
+            await lock.check()
+
         if len(google_ranges) != len(get_data):
             logger.error(f'Google ranges count is not equal {len(get_data)}')
-            await self._delete_lock(self._work_time_report_lock_key)
             raise ValueError(f'Google ranges count is not equal {len(get_data)}')
 
         raw_reports = google_ranges[0]
@@ -149,14 +238,9 @@ class GoogleRepository:
 
         reports = []
         for report_row in raw_reports:
-            report = await self._parse_work_time_report_row(report_row)
+            report = self._parse_work_time_report_row(report_row)
             if report and not report.removed:
                 reports.append(report)
-        await self.storage.set_data(
-            keys=[self._work_time_report_key, user.chat_id],
-            data={self._work_time_report_key: [report.dict() for report in reports]},
-            expired=300,  # TODO: move to constants
-        )
 
         try:
             if len(time_plan) == 1 and len(time_plan[0]) == 1:
@@ -178,86 +262,333 @@ class GoogleRepository:
                 report_from_date=report_from_date,
                 report_to_date=report_to_date,
             )
-            await self.storage.set_data(
-                keys=[self._work_time_report_stat_key, user.chat_id],
-                data={self._work_time_report_stat_key: stat.dict()},
-                expired=300,  # TODO: move to constants
-            )
         except IndexError:
             logger.warning(f'Error while parsing time plan, time fact, time net')
-            await self._delete_lock(self._work_time_report_lock_key)
             raise ValueError(f'Error while parsing time plan, time fact, time net')
+        return reports, stat
+
+    async def get_work_time_report_mirror(self) -> tuple[WorkTimeReport, ...]:
+        """
+        Every row of the reports sheet, removed ones included. Shared by all processes
+        through Redis, decoded once per mirror version.
+        """
+        version = int(await self.storage.redis.get(self._work_time_report_mirror_version_key) or 0)
+        if self._work_time_report_mirror is not None and self._work_time_report_mirror[0] == version:
+            return self._work_time_report_mirror[1]
+        data = await self.storage.get_data(keys=[self._work_time_report_mirror_key])
+        if not data:
+            async with self.work_time_report_mirror_lock() as lock:
+                # another process may have loaded it while this one waited for the lock
+                data = await self.storage.get_data(keys=[self._work_time_report_mirror_key])
+                if not data:
+                    return await self._load_work_time_report_mirror(lock)
+        reports = tuple(WorkTimeReport(**report) for report in data[self._work_time_report_mirror_key])
+        self._work_time_report_mirror = (data['version'], reports)
+        return reports
+
+    async def update_work_time_report_mirror(self) -> tuple[WorkTimeReport, ...]:
+        """Reloads the whole mirror from the sheet."""
+        async with self.work_time_report_mirror_lock() as lock:
+            return await self._load_work_time_report_mirror(lock)
+
+    async def sync_work_time_report_mirror(self) -> tuple[int, int]:
+        """
+        Brings the mirror up to date without reading the whole sheet: fetches the rows
+        appended after the cursor (the last synced row) and rescans the removed flags.
+        Returns the numbers of appended rows and changed flags.
+
+        Needs `=ROW()` in the column after the report data (I for A:H), the API drops
+        empty rows and the formula keeps every row and its number. Without it the
+        mirror is reloaded in full instead.
+        """
+        async with self.work_time_report_mirror_lock() as lock:
+            data = await self.storage.get_data(keys=[self._work_time_report_mirror_key])
+            if not data:
+                reports = await self._load_work_time_report_mirror(lock)
+                return len(reports), 0
+            return await self._sync_work_time_report_mirror(lock, data)
+
+    async def invalidate_work_time_report_mirror(self):
+        await self.storage.del_keys([[self._work_time_report_mirror_key]])
+        await self.storage.redis.incr(self._work_time_report_mirror_version_key)
+
+    def _work_time_report_mirror_columns(self) -> tuple[str, str, int]:
+        """First column, row id column (the =ROW() column after the data) and the first row."""
+        start_col, start_row, end_col, _ = parse_a1_range(self.work_time_report_sheet_range)
+        return column_letters(start_col), column_letters(end_col + 1), start_row + 1
+
+    async def _load_work_time_report_mirror(
+        self,
+        lock: RedisLockHandle,
+    ) -> tuple[WorkTimeReport, ...]:
+        first_col, row_id_col, first_row = self._work_time_report_mirror_columns()
+        sheet_range = f'{first_col}{first_row}:{self.work_time_report_remove_col}'
+        google_ranges = await self.google_sheet_service.get_ranges(
+            spreadsheet_id=self.spreadsheet_id,
+            ranges=[(self.work_time_report_sheet_name, sheet_range)],
+        )
+        if len(google_ranges) != 1:
+            raise ValueError('Google ranges count is not equal 1')
+        reports, cursor, row_ids = self._parse_work_time_report_mirror_rows(google_ranges[0], first_row)
+        if not row_ids:
+            logger.warning(f'Column {row_id_col} of {self.work_time_report_sheet_name} does not hold =ROW(), '
+                           f'the work time report mirror is synced by full reloads')
+        await lock.check()
+        return await self._save_work_time_report_mirror(reports, cursor, row_ids)
+
+    async def _sync_work_time_report_mirror(self, lock: RedisLockHandle, data: dict) -> tuple[int, int]:
+        if not data.get('row_ids'):
+            reports = await self._load_work_time_report_mirror(lock)
+            return len(reports), 0
+        first_col, row_id_col, first_row = self._work_time_report_mirror_columns()
+        cursor = data['cursor']
+        ranges = [(self.work_time_report_sheet_name, f'{first_col}{cursor + 1}:{self.work_time_report_remove_col}')]
+        if cursor >= first_row:
+            # row ids keep every row non-empty, empty rows would be dropped by the API
+            ranges.append((
+                self.work_time_report_sheet_name,
+                f'{row_id_col}{first_row}:{self.work_time_report_remove_col}{cursor}',
+            ))
+        google_ranges = await self.google_sheet_service.get_ranges(
+            spreadsheet_id=self.spreadsheet_id,
+            ranges=ranges,
+        )
+        if len(google_ranges) != len(ranges):
+            raise ValueError(f'Google ranges count is not equal {len(ranges)}')
+
+        reports = [WorkTimeReport(**report) for report in data[self._work_time_report_mirror_key]]
+        flags_changed = 0
+        if len(google_ranges) > 1:
+            remove_index = column_index(self.work_time_report_remove_col) - column_index(row_id_col)
+            removed_rows = set()
+            for row in google_ranges[1]:
+                if row and row[0].isdigit() and len(row) > remove_index and row[remove_index] == SpreadsheetBool.yes:
+                    removed_rows.add(int(row[0]))
+            for report in reports:
+                removed = report.row_id in removed_rows
+                if report.removed != removed:
+                    report.removed = removed
+                    flags_changed += 1
+
+        appended, new_cursor, row_ids = self._parse_work_time_report_mirror_rows(google_ranges[0], cursor + 1)
+        if not row_ids:
+            # the new rows have no valid row ids, their positions are not reliable either
+            reports = await self._load_work_time_report_mirror(lock)
+            return len(reports), 0
+        if not appended and not flags_changed:
+            return 0, 0
+        await lock.check()
+        await self._save_work_time_report_mirror(reports + appended, max(cursor, new_cursor), row_ids)
+        return len(appended), flags_changed
+
+    def _parse_work_time_report_mirror_rows(
+        self,
+        rows: list[list[str]],
+        first_row: int,
+    ) -> tuple[list[WorkTimeReport], int, bool]:
+        """
+        Reports from `A:J` rows starting at `first_row`, the number of the last row and
+        whether the row id column holds the row numbers. If it does not, the ids are
+        taken from the positions, which is exact only while the sheet has no empty rows.
+        """
+        first_col, row_id_col, _ = self._work_time_report_mirror_columns()
+        row_id_index = column_index(row_id_col) - column_index(first_col)
+        remove_index = column_index(self.work_time_report_remove_col) - column_index(first_col)
+        reports = []
+        last_row = first_row - 1
+        row_ids = True
+        for position, row in enumerate(rows, first_row):
+            row_id = str(position)
+            # with =ROW() no row is empty, so the API skips none and the ids match the positions
+            if len(row) <= row_id_index or row[row_id_index] != row_id:
+                row_ids = False
+            cells = (row + [''] * row_id_index)[:row_id_index]
+            if not any(cells):
+                continue
+            last_row = position
+            removed = row[remove_index] if len(row) > remove_index else ''
+            report = self._parse_work_time_report_row(cells + [row_id, removed])
+            if report:
+                reports.append(report)
+        return reports, last_row, row_ids
+
+    async def _save_work_time_report_mirror(
+        self,
+        reports: list[WorkTimeReport],
+        cursor: int,
+        row_ids: bool,
+    ) -> tuple[WorkTimeReport, ...]:
+        version = await self.storage.redis.incr(self._work_time_report_mirror_version_key)
+        await self.storage.set_data(
+            keys=[self._work_time_report_mirror_key],
+            data={
+                'version': version,
+                'cursor': cursor,
+                'row_ids': row_ids,
+                self._work_time_report_mirror_key: [report.dict() for report in reports],
+            },
+            expired=self.work_time_report_mirror_expire_seconds or None,
+        )
+        self._work_time_report_mirror = (version, tuple(reports))
+        return self._work_time_report_mirror[1]
 
-        await self._delete_lock(self._work_time_report_lock_key)
+    async def _patch_work_time_report_mirror(
+        self,
+        removed_row_id: int | None = None,
+        appended: list[WorkTimeReport] | None = None,
+        first_row_id: int | None = None,
+    ):
+        """
+        Applies a write made by the bot to the mirror, so the next report sees it
+        without reading the sheet. Appends that do not follow the cursor are synced instead.
+        """
+        try:
+            async with self.work_time_report_mirror_lock() as lock:
+                data = await self.storage.get_data(keys=[self._work_time_report_mirror_key])
+                if not data:
+                    return
+                cursor = data['cursor']
+                reports = [WorkTimeReport(**report) for report in data[self._work_time_report_mirror_key]]
+                if removed_row_id is not None:
+                    for report in reports:
+                        if report.row_id == removed_row_id:
+                            report.removed = True
+                if appended:
+                    if first_row_id != cursor + 1:
+                        await self._sync_work_time_report_mirror(lock, data)
+                        return
+                    reports.extend(
+                        replace(report, row_id=first_row_id + i, removed=False) for i, report in enumerate(appended)
+                    )
+                    cursor += len(appended)
+                await lock.check()
+                await self._save_work_time_report_mirror(reports, cursor, data.get('row_ids', False))
+        except Exception as exc:
+            logger.exception(exc)
+            await self.invalidate_work_time_report_mirror()
 
     async def append_work_time_report(self, report: WorkTimeReport) -> bool:
         data = [report.get_list()]
-        return self.google_sheet_service.append(
+        result = await self.google_sheet_service.append(
             spreadsheet_id=self.spreadsheet_id,
             sheet_name=self.work_time_report_sheet_name,
             sheet_range=self.work_time_report_sheet_range,
             data=data,
         )
+        if result and self.local_reports:
+            await self.invalidate_work_time_report_mirror()
+        return result
 
-    async def update_handbooks_data(self):
-        data = [
-            (self.users_sheet_name, self.users_sheet_range,),
-            (self.work_types_sheet_name, self.work_types_sheet_range,),
-            (self.clients_sheet_name, self.clients_sheet_range,)
-        ]
+    async def append_work_time_reports(self, reports: list[WorkTimeReport]) -> int | bool:
+        """Appends all reports with one call, returns the row id of the first one."""
+        result = await self.google_sheet_service.append(
+            spreadsheet_id=self.spreadsheet_id,
+            sheet_name=self.work_time_report_sheet_name,
+            sheet_range=self.work_time_report_sheet_range,
+            data=[report.get_list() for report in reports],
+            return_row_id=True,
+        )
+        if result and self.local_reports:
+            await self._patch_work_time_report_mirror(appended=reports, first_row_id=result)
+        return result
+
+    async def update_handbook(self, key: str):
+        await self.update_handbooks_data([key])
 
-        google_ranges = self.google_sheet_service.get_ranges(
+    async def update_handbooks_data(self, keys: list[str] | None = None):
+        handbooks = [self.handbooks[key] for key in keys] if keys else list(self.handbooks.values())
+        data = [(handbook.sheet_name, handbook.sheet_range,) for handbook in handbooks]
+
+        google_ranges = await self.google_sheet_service.get_ranges(
             spreadsheet_id=self.spreadsheet_id,
             ranges=data,
         )
 
         if len(google_ranges) != len(data):
+            if await self._restore_handbooks_snapshot(handbooks):
+                logger.warning('Google sheets are unavailable, serving the last good handbooks')
+                return
             raise ValueError(f'Google ranges count is not equal {len(data)}')
 
-        # Users
-        users_range = google_ranges[0]
-        users = []
-        for user_row in users_range:
-            user = await self._parse_user_row(user_row)
-            if user:
-                users.append(user)
-
-        await self.storage.set_data(
-            keys=[self._user_list_key],
-            data={self._user_list_key: [user.dict() for user in users]},
-            expired=self.handbook_expire_seconds,
+        changed = {}
+        hashes = {}
+        for handbook, raw_range in zip(handbooks, google_ranges):
+            key = handbook.key
+            range_hash = hashlib.sha1(json.dumps(raw_range, ensure_ascii=False).encode()).hexdigest()
+            stored_hash = await self.storage.get_data(keys=[self._handbook_hash_key, key])
+            if (stored_hash.get('hash') == range_hash
+                    and await self.storage.expire(keys=[key], expired=handbook.expire_seconds)):
+                # unchanged in the spreadsheet, keep the data and downstream caches
+                continue
+            items = [item for item in map(handbook.parse_row, raw_range) if item]
+            if handbook.sort_key is not None:
+                items.sort(key=handbook.sort_key)
+            changed[key] = [item.dict() for item in items]
+            hashes[key] = range_hash
+
+        if changed:
+            logger.info(f'Handbooks changed: {", ".join(changed)}')
+            if self._user_list_key in changed:
+                await self.revoke_users(await self._get_revoked_user_codes(changed[self._user_list_key]))
+            await self._save_handbooks(changed, hashes)
+
+    async def _get_revoked_user_codes(self, users: list[dict]) -> set[str]:
+        active = {user['id'].strip() for user in users if user['is_active']}
+        snapshot = await self.storage.get_data(keys=[self._handbook_snapshot_key, self._user_list_key])
+        if snapshot:
+            previous = {user['id'].strip() for user in snapshot[self._user_list_key] if user['is_active']}
+        else:
+            # first load, check everyone with a session
+            previous = {
+                key.split(self.storage.key_separator, 1)[1]
+                for key in await self.storage.scan_keys([self._user_chats_key])
+            }
+        return previous - active
+
+    async def revoke_users(self, codes: set[str]):
+        """Logs out deactivated or removed users from every chat and drops their cached data."""
+        for code in codes:
+            chat_ids = await self.storage.get_set([self._user_chats_key, code])
+            keys = [[self._user_chats_key, code]]
+            for chat_id in chat_ids:
+                keys.extend([
+                    [self._user_key, chat_id],
+                    [self._scenario_key, chat_id],
+                    [self._work_time_report_key, chat_id],
+                    [self._work_time_report_stat_key, chat_id],
+                ])
+            await self.storage.del_keys(keys)
+            if chat_ids:
+                logger.info(f'User {code} is deactivated, logged out from {len(chat_ids)} chats')
+
+    async def _save_handbooks(self, handbooks: dict[str, list[dict]], hashes: dict[str, str]):
+        # all handbooks are swapped at once, readers never see a mix of old and new data
+        await self.storage.set_many(
+            [([key], {key: items}, self.handbooks[key].expire_seconds) for key, items in handbooks.items()],
         )
-
-        # Work types
-        work_types_range = google_ranges[1]
-        work_types = []
-        for work_type_row in work_types_range:
-            work_type = await self._parse_work_type_row(work_type_row)
-            if work_type:
-                work_types.append(work_type)
-
-        await self.storage.set_data(
-            keys=[self._work_types_key],
-            data={self._work_types_key: [work_type.dict() for work_type in work_types]},
-            expired=self.handbook_expire_seconds,
+        # last good copy without expiration, used while Google sheets are unavailable
+        await self.storage.set_many(
+            [([self._handbook_snapshot_key, key], {key: items}) for key, items in handbooks.items()]
+            + [([self._handbook_hash_key, key], {'hash': range_hash}) for key, range_hash in hashes.items()],
         )
+        await self.handbook_cache.bump()
 
-        # Clients
-        clients_range = google_ranges[2]
-        clients = []
-        for client_row in clients_range:
-            client = await self._parse_client_row(client_row)
-            if client:
-                clients.append(client)
-        clients = sorted(clients, key=lambda x: x.name.lower())
-
-        await self.storage.set_data(
-            keys=[self._clients_key],
-            data={self._clients_key: [client.dict() for client in clients]},
-            expired=self.handbook_expire_seconds,
+    async def _restore_handbooks_snapshot(self, handbooks: list['Handbook']) -> bool:
+        snapshots = await self.storage.get_many(
+            [[self._handbook_snapshot_key, handbook.key] for handbook in handbooks],
         )
+        if not all(snapshots):
+            return False
+        await self.storage.set_many(
+            [
+                ([handbook.key], snapshot, handbook.expire_seconds)
+                for handbook, snapshot in zip(handbooks, snapshots)
+            ],
+        )
+        await self.handbook_cache.bump()
+        return True
 
-    async def _parse_work_time_report_row(self, report_row: list[str]) -> WorkTimeReport | None:
+    def _parse_work_time_report_row(self, report_row: list[str]) -> WorkTimeReport | None:
         if len(report_row) < 9:
             logger.warning(f'Work time report row is too short: {report_row}')
             return None
@@ -285,29 +616,7 @@ class GoogleRepository:
             removed=removed,
         )
 
-    async def _set_lock(self, lock_key: str):
-        attempt_count = 0
-        while True:
-            lock = await self.storage.get_data(keys=[lock_key])
-            if lock:
-                attempt_count += 1
-                if attempt_count >= self._lock_attempt_count:
-                    logger.warning(f'Lock timeout for work time report '
-                                   f'{user}, {report_date}, {client}')
-                    raise LockTimeoutError
-                await asyncio.sleep(1)
-                continue
-            await self.storage.set_data(
-                keys=[lock_key],
-                data={lock_key: True},
-                expired=30,  # TODO: move to constants
-            )
-            break
-
-    async def _delete_lock(self, lock_key: str):
-        await self.storage.set_data(keys=[lock_key], data={})
-
-    async def _parse_client_row(self, client_row: list[str]) -> str | None:
+    def _parse_client_row(self, client_row: list[str]) -> Client | None:
         if len(client_row) < 2:
             logger.warning(f'Client row is too short: {client_row}')
             return None
@@ -325,7 +634,7 @@ class GoogleRepository:
             completed=client_row[1] == SpreadsheetBool.yes,
         )
 
-    async def _parse_work_type_row(self, work_type_row: list[str]) -> str | None:
+    def _parse_work_type_row(self, work_type_row: list[str]) -> WorkType | None:
         if len(work_type_row) < 1:
             logger.warning(f'Work type row is too short: {work_type_row}')
             return None
@@ -336,7 +645,7 @@ class GoogleRepository:
 
         return WorkType(name=str(work_type_row[0]))
 
-    async def _parse_user_row(self, user_row: list[str]) -> User | None:
+    def _parse_user_row(self, user_row: list[str]) -> User | None:
         row_min_len = 5
         if len(user_row) < row_min_len:
             logger.warning(f'User row is too short: {user_row}')
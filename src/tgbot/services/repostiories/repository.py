@@ -1,5 +1,6 @@
 from services.storage import Storage
-from services.google_sheets_api_service import GoogleSheetsApiService
+from services.google_sheets_async_api_service import AbstractSheetsService
+from services.work_time_report_outbox import WorkTimeReportOutbox
 
 from .google_repository import GoogleRepository
 from .user_repository import UserRepository
@@ -13,8 +14,10 @@ class Repository:
     def __init__(
         self,
         storage: Storage,
-        google_sheet_service: GoogleSheetsApiService,
+        google_sheet_service: AbstractSheetsService,
         google_repository: GoogleRepository,
+        outbox: WorkTimeReportOutbox,
+        scenario_expire_seconds: int = 86400,
     ):
         self.storage = storage
         self.google_sheet_service = google_sheet_service
@@ -28,6 +31,7 @@ class Repository:
             storage=storage,
             google_sheet_service=google_sheet_service,
             google_repository=google_repository,
+            expire_seconds=scenario_expire_seconds,
         )
         self.work_types = WorkTypeRepository(
             storage=storage,
@@ -43,4 +47,5 @@ class Repository:
             storage=storage,
             google_sheet_service=google_sheet_service,
             google_repository=google_repository,
+            outbox=outbox,
         )
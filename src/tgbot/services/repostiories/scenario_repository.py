@@ -1,9 +1,11 @@
 import logging
 
+from redis.exceptions import ResponseError
+
 from models import User, Scenario, ScenarioStep
 
 from services.constants import RedisKeys
-from services.google_sheets_api_service import GoogleSheetsApiService
+from services.google_sheets_async_api_service import AbstractSheetsService
 from services.storage import Storage
 from .google_repository import GoogleRepository
 
@@ -11,40 +13,88 @@ logger = logging.getLogger(__name__)
 
 
 class ScenarioRepository:
+    """
+    A scenario is a Redis hash: `name`, `current_step` and a `step:<number>` field
+    per step, so a step update writes only the fields it changed. Every write
+    extends the TTL, abandoned scenarios expire after `expire_seconds`.
+    """
+
     _scenario_key = RedisKeys.SCENARIO_KEY
+    _step_field_prefix = 'step:'
 
     def __init__(
         self,
         storage: Storage,
-        google_sheet_service: GoogleSheetsApiService,
+        google_sheet_service: AbstractSheetsService,
         google_repository: GoogleRepository,
+        expire_seconds: int = 86400,
     ):
         self.storage = storage
         self.google_sheet_service = google_sheet_service
         self.google_repository = google_repository
+        self.expire_seconds = expire_seconds
 
     async def del_user_scenario(self, user: User):
-        await self.storage.set_data(
-            keys=[self._scenario_key, user.chat_id],
-            data={},
-        )
+        await self.storage.del_keys([[self._scenario_key, user.chat_id]])
 
     async def upsert_user_scenario(self, user: User, scenario: Scenario):
-        steps = [step.dict() for step in scenario.steps]
-        scenario_dict = scenario.dict()
-        scenario_dict['steps'] = steps
-        await self.storage.set_data(
+        """Replaces the whole scenario, steps missing from `scenario` are dropped."""
+        keys = [self._scenario_key, user.chat_id]
+        async with self.storage.transaction() as tr:
+            await tr.del_keys([keys])
+            await tr.set_fields(keys, self._scenario_fields(scenario, scenario.steps), self.expire_seconds)
+
+    async def upsert_user_scenario_step(self, user: User, scenario: Scenario, step_number: int) -> bool:
+        """
+        Writes one step and the current step of a stored scenario. Returns False if the
+        scenario is gone (expired, cancelled or finished meanwhile), a partial one is not recreated.
+        """
+        steps = [step for step in scenario.steps if step.number == step_number]
+        written = await self.storage.set_fields_if_exists(
             keys=[self._scenario_key, user.chat_id],
-            data=scenario_dict,
+            fields=self._scenario_fields(scenario, steps),
+            expired=self.expire_seconds,
         )
+        if not written:
+            logger.info(f'Scenario {scenario.name} of chat {user.chat_id} is gone, step {step_number} is not saved')
+        return written
 
     async def get_user_scenario(self, user: User) -> Scenario | None:
-        scenario_dict = await self.storage.get_data(
-            keys=[self._scenario_key, user.chat_id],
+        keys = [self._scenario_key, user.chat_id]
+        try:
+            fields = await self.storage.get_fields(keys=keys)
+        except ResponseError as exc:
+            if 'WRONGTYPE' not in str(exc):
+                raise
+            return await self._migrate_legacy_scenario(user)
+        if not fields.get('name'):
+            return None
+        steps = [
+            ScenarioStep(**step)
+            for field, step in fields.items()
+            if field.startswith(self._step_field_prefix)
+        ]
+        return Scenario(
+            name=fields['name'],
+            current_step=fields['current_step'],
+            steps=sorted(steps, key=lambda step: step.number),
         )
-        if not scenario_dict:
+
+    def _scenario_fields(self, scenario: Scenario, steps: list[ScenarioStep]) -> dict:
+        fields = {'name': scenario.name, 'current_step': scenario.current_step}
+        for step in steps:
+            fields[f'{self._step_field_prefix}{step.number}'] = step.dict()
+        return fields
+
+    async def _migrate_legacy_scenario(self, user: User) -> Scenario | None:
+        """Scenarios saved before the hash layout are single JSON strings."""
+        scenario_dict = await self.storage.get_data(keys=[self._scenario_key, user.chat_id])
+        try:
+            scenario_steps = [ScenarioStep(**step) for step in scenario_dict.pop('steps')]
+            scenario = Scenario(**scenario_dict, steps=scenario_steps)
+        except Exception as exc:
+            logger.exception(exc)
+            await self.del_user_scenario(user)
             return None
-        scenario_steps = scenario_dict.pop('steps')
-        scenario_steps = [ScenarioStep(**step) for step in scenario_steps]
-        scenario = Scenario(**scenario_dict, steps=scenario_steps)
+        await self.upsert_user_scenario(user, scenario)
         return scenario
@@ -1,10 +1,10 @@
 import logging
-import json
+from typing import Callable
 
 from services.storage import Storage
 from models import User
 from services.constants import RedisKeys
-from services.google_sheets_api_service import GoogleSheetsApiService
+from services.google_sheets_async_api_service import AbstractSheetsService
 
 from .google_repository import GoogleRepository
 
@@ -14,68 +14,110 @@ logger = logging.getLogger(__name__)
 class UserRepository:
     _user_list_key = RedisKeys.USERS_LIST_KEY
     _user_key = RedisKeys.USER_KEY
+    _user_chats_key = RedisKeys.USER_CHATS_KEY
 
     def __init__(
         self,
         storage: Storage,
-        google_sheet_service: GoogleSheetsApiService,
+        google_sheet_service: AbstractSheetsService,
         google_repository: GoogleRepository,
     ):
         self.storage = storage
         self.google_sheet_service = google_sheet_service
         self.google_repository = google_repository
 
-    async def delete_user(self, chat_id: int):
-        await self.storage.del_keys([[self._user_key, str(chat_id)]])
+    async def delete_user(self, chat_id: int, user_id: str | None = None):
+        if user_id is None:
+            user_dict = await self.storage.get_data(keys=[self._user_key, str(chat_id)])
+            user_id = user_dict.get('id')
+        async with self.storage.transaction() as tr:
+            await tr.del_keys([[self._user_key, str(chat_id)]])
+            if user_id:
+                await tr.remove_from_set([self._user_chats_key, user_id.strip()], chat_id)
 
     async def get_user_by_chat_id(self, chat_id: int) -> User | None:
-        _user = None
+        # deactivated users are logged out by the handbook refresh (required at startup),
+        # see GoogleRepository.revoke_users
         user_dict = await self.storage.get_data(
             keys=[self._user_key, str(chat_id)],
         )
         if not user_dict:
-            return _user
+            return None
 
         try:
-            _user = User(**user_dict)
+            return User(**user_dict)
         except Exception as exc:
             logger.exception(exc)
-            return _user
-
-        _user_from_sheet = await self.get_user_by_code(_user.id)
-        if _user_from_sheet and not _user_from_sheet.is_active:
-            await self.storage.set_data(keys=[self._user_key, str(chat_id)])
             return None
 
-        return _user
-
     async def get_user_by_code(self, user_code: str) -> User | None:
-        user_code = user_code.strip()
-        users = await self.get_users()
-        for user in users:
-            if user.id.strip() == user_code and user.is_active:
-                return user
+        users_by_code = await self._get_index('code', _index_by_code)
+        user = users_by_code.get(user_code.strip())
+        if user and user.is_active:
+            return user
         return None
 
+    async def get_user_id_by_fullname(self, fullname: str) -> str | None:
+        user_ids_by_fullname = await self._get_index('fullname', _index_by_fullname)
+        return user_ids_by_fullname.get(normalize_fullname(fullname))
+
     async def upsert(self, user: User) -> None:
         if not user.chat_id:
             raise ValueError('User chat_id is required to upsert user')
-        await self.storage.set_data(
-            keys=[self._user_key, str(user.chat_id)],
-            data=user.dict(),
-        )
+        async with self.storage.transaction() as tr:
+            await tr.set_data(
+                keys=[self._user_key, str(user.chat_id)],
+                data=user.dict(),
+            )
+            await tr.add_to_set([self._user_chats_key, user.id.strip()], user.chat_id)
+
+    async def rebuild_chats_index(self) -> None:
+        """Fills the code -> chat_ids index from existing sessions."""
+        keys = await self.storage.scan_keys([self._user_key])
+        if not keys:
+            return
+        user_dicts = await self.storage.get_many([[key] for key in keys])
+        async with self.storage.transaction() as tr:
+            for user_dict in user_dicts:
+                if user_dict.get('id') and user_dict.get('chat_id'):
+                    await tr.add_to_set([self._user_chats_key, user_dict['id'].strip()], user_dict['chat_id'])
+
+    async def get_users(self) -> tuple[User, ...]:
+        users = await self.google_repository.handbook_cache.get(self._user_list_key, _build_user)
+        if users is None:
+            await self.google_repository.update_handbook(self._user_list_key)
+            users = await self.google_repository.handbook_cache.get(self._user_list_key, _build_user)
+        return users or ()
+
+    async def _get_index(self, name: str, build: Callable[[tuple[User, ...]], dict]) -> dict:
+        cache = self.google_repository.handbook_cache
+        index = await cache.get_index(self._user_list_key, _build_user, name, build)
+        if index is None:
+            await self.google_repository.update_handbook(self._user_list_key)
+            index = await cache.get_index(self._user_list_key, _build_user, name, build)
+        return index or {}
+
+
+def _build_user(user_dict: dict) -> User:
+    return User(**user_dict)
+
+
+def normalize_fullname(fullname: str) -> str:
+    return ' '.join(fullname.split()).casefold()
+
+
+def _index_by_code(users: tuple[User, ...]) -> dict[str, User]:
+    index = {}
+    for user in users:
+        code = user.id.strip()
+        # an active user wins over inactive duplicates of the code
+        if code not in index or (user.is_active and not index[code].is_active):
+            index[code] = user
+    return index
+
 
-    async def get_users(self) -> list[User]:
-        users_dict = await self.storage.get_data(keys=[self._user_list_key])
-        if not users_dict:
-            await self.google_repository.update_handbooks_data()
-            users_dict = await self.storage.get_data(keys=[self._user_list_key])
-        users_list = users_dict.get(self._user_list_key, [])
-        users = []
-        for users_dict in users_list:
-            try:
-                users.append(User(**users_dict))
-            except Exception as exc:
-                logger.exception(exc)
-                continue
-        return users
+def _index_by_fullname(users: tuple[User, ...]) -> dict[str, str]:
+    index = {}
+    for user in users:
+        index.setdefault(normalize_fullname(user.fullname), user.id)
+    return index
@@ -2,8 +2,9 @@ import logging
 
 from models import User, WorkTimeReportStat, WorkTimeReport
 from services.constants import RedisKeys
-from services.google_sheets_api_service import GoogleSheetsApiService
+from services.google_sheets_async_api_service import AbstractSheetsService
 from services.storage import Storage
+from services.work_time_report_outbox import WorkTimeReportOutbox
 from .google_repository import GoogleRepository
 
 logger = logging.getLogger(__name__)
@@ -17,12 +18,17 @@ class WorkTimeReportRepository:
     def __init__(
         self,
         storage: Storage,
-        google_sheet_service: GoogleSheetsApiService,
+        google_sheet_service: AbstractSheetsService,
         google_repository: GoogleRepository,
+        outbox: WorkTimeReportOutbox,
     ):
         self.storage = storage
         self.google_sheet_service = google_sheet_service
         self.google_repository = google_repository
+        self.outbox = outbox
+
+    async def add_report(self, report: WorkTimeReport) -> str:
+        return await self.outbox.enqueue(report)
 
     async def delete_report(self, report_id: int) -> bool:
         return await self.google_repository.mark_report_removed(report_id)
@@ -40,46 +46,29 @@ class WorkTimeReportRepository:
             [self._work_time_report_stat_key, user.chat_id],
         ])
 
-    async def get_stats(
+    async def get_reports_and_stats(
         self,
         user: User,
         report_from_date: str | None = None,
         report_to_date: str | None = None,
         client: str | None = None,
         user_id: str | None = None,
-    ) -> WorkTimeReportStat:
-        keys = [self._work_time_report_stat_key, user.chat_id]
-        stats = await self.storage.get_data(keys=keys)
-        if not stats:
-            await self.google_repository.update_work_time_report_data(
-                user, report_from_date, report_to_date, client, user_id)
-            stats = await self.storage.get_data(keys=keys)
-
-        if not stats:
-            stats = {
-                self._work_time_report_stat_key: {
-                    'report_date': report_date,
-                },
-            }
-
-        return WorkTimeReportStat(**stats[self._work_time_report_stat_key])
-
-    async def get_reports(
-        self,
-        user: User,
-        report_from_date: str | None = None,
-        report_to_date: str | None = None,
-        client: str | None = None,
-        user_id: str | None = None,
-    ) -> list[WorkTimeReport]:
-        keys = [self._work_time_report_key, user.chat_id]
-        reports = await self.storage.get_data(keys=keys)
-        if not reports:
+    ) -> tuple[list[WorkTimeReport], WorkTimeReportStat]:
+        keys = [
+            [self._work_time_report_key, user.chat_id],
+            [self._work_time_report_stat_key, user.chat_id],
+        ]
+        reports, stats = await self.storage.get_many(keys)
+        if not reports or not stats:
             await self.google_repository.update_work_time_report_data(
                 user, report_from_date, report_to_date, client, user_id)
-            reports = await self.storage.get_data(keys=keys)
+            reports, stats = await self.storage.get_many(keys)
 
+        if stats:
+            stat = WorkTimeReportStat(**stats[self._work_time_report_stat_key])
+        else:
+            stat = WorkTimeReportStat(report_from_date=report_from_date, report_to_date=report_to_date)
         if not reports:
-            return []
+            return [], stat
 
-        return [WorkTimeReport(**report) for report in reports[self._work_time_report_key]]
+        return [WorkTimeReport(**report) for report in reports[self._work_time_report_key]], stat
@@ -3,7 +3,7 @@ import logging
 from models import WorkType
 
 from services.constants import RedisKeys
-from services.google_sheets_api_service import GoogleSheetsApiService
+from services.google_sheets_async_api_service import AbstractSheetsService
 from services.storage import Storage
 from .google_repository import GoogleRepository
 
@@ -16,22 +16,18 @@ class WorkTypeRepository:
     def __init__(
         self,
         storage: Storage,
-        google_sheet_service: GoogleSheetsApiService,
+        google_sheet_service: AbstractSheetsService,
         google_repository: GoogleRepository,
     ):
         self.storage = storage
         self.google_sheet_service = google_sheet_service
         self.google_repository = google_repository
 
-    async def get_work_types(self) -> list[WorkType]:
-        work_types = await self.storage.get_data(
-            keys=[self._work_type_key],
-        )
-        if not work_types:
-            await self.google_repository.update_handbooks_data()
-            work_types = await self.storage.get_data(keys=[self._work_type_key])
-
-        if not work_types:
-            return []
-
-        return [WorkType(**work_type) for work_type in work_types[self._work_type_key]]
+    async def get_work_types(self) -> tuple[WorkType, ...]:
+        work_types = await self.google_repository.handbook_cache.get(self._work_type_key, lambda x: WorkType(**x))
+        if work_types is None:
+            await self.google_repository.update_handbook(self._work_type_key)
+            work_types = await self.google_repository.handbook_cache.get(
+                self._work_type_key, lambda x: WorkType(**x),
+            )
+        return work_types or ()
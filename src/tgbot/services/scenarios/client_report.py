@@ -10,6 +10,7 @@ from services.constants import Replies, MenuButtons, Notifications
 from services.notifier import AbstractNotifier
 from services.repostiories import Repository
 from services.utils import create_calendar_response, create_reply_keyboard_response, create_message_response, create_inline_keyboard_response
+from services.picker import PickerKind, create_picker_response
 
 logger = logging.getLogger(__name__)
 
@@ -63,14 +64,7 @@ class ClientReportScenario:
         if message is None:
             await self.notifier.notify(Replies.LOADING, user)
 
-        reports = await self.repository.work_time_reports.get_reports(
-            user=user,
-            report_from_date=report_from_date,
-            report_to_date=report_to_date,
-            client=report_client,
-            user_id=report_user,
-        )
-        stats = await self.repository.work_time_reports.get_stats(
+        reports, stats = await self.repository.work_time_reports.get_reports_and_stats(
             user=user,
             report_from_date=report_from_date,
             report_to_date=report_to_date,
@@ -112,14 +106,7 @@ class ClientReportScenario:
                         index_offset = 0
                     else:
                         await self.repository.work_time_reports.remove_reports_from_cache(user)
-                        reports = await self.repository.work_time_reports.get_reports(
-                            user=user,
-                            report_from_date=report_from_date,
-                            report_to_date=report_to_date,
-                            client=report_client,
-                            user_id=report_user,
-                        )
-                        stats = await self.repository.work_time_reports.get_stats(
+                        reports, stats = await self.repository.work_time_reports.get_reports_and_stats(
                             user=user,
                             report_from_date=report_from_date,
                             report_to_date=report_to_date,
@@ -271,29 +258,17 @@ class ClientReportScenario:
         if not user.admin:
             return await self._fix_and_next(step_number, user.id, user, scenario)
 
-        users = await self.repository.users.get_users()
-        users_buttons = [[user.fullname] for user in users]
-        users_buttons.append([Replies.SKIP])
-
         if message is not None:
             if message == Replies.SKIP:
                 return await self._fix_and_next(step_number, user.id, user, scenario)
-            right_answers = {user.fullname.strip(): user.id for user in users}
-            user_id = right_answers.get(message.strip())
+            user_id = await self.repository.users.get_user_id_by_fullname(message)
             if user_id is None:
-                return await create_reply_keyboard_response(
-                    messages=[Replies.WRONG_USER, Replies.CHOOSE_USER],
-                    buttons=users_buttons,
-                    resize_keyboard=True,
+                return await create_picker_response(
+                    self.repository, PickerKind.users, [Replies.WRONG_USER, Replies.CHOOSE_USER], skip=True,
                 )
             return await self._fix_and_next(step_number, user_id, user, scenario)
 
-        return await create_reply_keyboard_response(
-            messages=[Replies.CHOOSE_USER],
-            buttons=users_buttons,
-            resize_keyboard=True,
-
-        )
+        return await create_picker_response(self.repository, PickerKind.users, [Replies.CHOOSE_USER], skip=True)
 
     async def choose_client(
         self,
@@ -303,26 +278,18 @@ class ClientReportScenario:
     ) -> Response:
         step_number = self.report_client_step
         await self._add_step(step_number, user, scenario)
-        clients = await self.repository.clients.get_clients(is_completed=False)
-        client_list = [[client.name] for client in clients]
-        if scenario.steps[self.report_from_date_step - 1].result is not None:
-            client_list.append([Replies.SKIP])
+        skip = scenario.steps[self.report_from_date_step - 1].result is not None
         if message is not None:
-            right_answers = [client.name.strip() for client in clients]
-            right_answers.extend([Replies.SKIP])
-            if message.strip() not in right_answers:
-                return await create_reply_keyboard_response(
-                    messages=[Replies.WRONG_CLIENT, Replies.CHOOSE_CLIENT],
-                    buttons=client_list,
-                    resize_keyboard=True,
-                )
             if message == Replies.SKIP:
-                message = None
-            return await self._fix_and_next(step_number, message, user, scenario)
-        return await create_reply_keyboard_response(
-            messages=[Replies.CHOOSE_CLIENT],
-            buttons=client_list,
-            resize_keyboard=True,
+                return await self._fix_and_next(step_number, None, user, scenario)
+            client = await self.repository.clients.get_client(message)
+            if client is None:
+                return await create_picker_response(
+                    self.repository, PickerKind.clients, [Replies.WRONG_CLIENT, Replies.SEARCH_CLIENT], skip=skip,
+                )
+            return await self._fix_and_next(step_number, client.name, user, scenario)
+        return await create_picker_response(
+            self.repository, PickerKind.clients, [Replies.CHOOSE_CLIENT, Replies.SEARCH_CLIENT], skip=skip,
         )
 
     async def enter_to_date(
@@ -403,7 +370,7 @@ class ClientReportScenario:
             if _step.number == step:
                 return scenario
         scenario.steps.append(ScenarioStep(number=step))
-        await self.repository.scenarios.upsert_user_scenario(user, scenario)
+        await self.repository.scenarios.upsert_user_scenario_step(user, scenario, step)
         return scenario
 
     async def _fix_and_next(
@@ -418,5 +385,5 @@ class ClientReportScenario:
                 _step.result = result
                 break
         scenario.current_step = step + 1
-        await self.repository.scenarios.upsert_user_scenario(user, scenario)
+        await self.repository.scenarios.upsert_user_scenario_step(user, scenario, step)
         return await self.step_dispatcher[scenario.current_step](user, scenario)
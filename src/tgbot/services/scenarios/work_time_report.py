@@ -8,6 +8,7 @@ from services.notifier import AbstractNotifier
 from services.repostiories import Repository
 from services.utils import create_reply_keyboard_response, create_message_response
 from services.utils import create_calendar_response
+from services.picker import PickerKind, create_picker_response
 
 logger = logging.getLogger(__name__)
 
@@ -86,20 +87,15 @@ class WorkTimeReportScenario:
     ) -> Response:
         step_number = 3
         await self._add_step(step_number, user, scenario)
-        clients = await self.repository.clients.get_clients(is_completed=False)
-        client_list = [[client.name] for client in clients]
         if message is not None:
-            if message.strip() not in [client.name.strip() for client in clients]:
-                return await create_reply_keyboard_response(
-                    messages=[Replies.WRONG_CLIENT, Replies.CHOOSE_CLIENT],
-                    buttons=client_list,
-                    resize_keyboard=True,
+            client = await self.repository.clients.get_client(message)
+            if client is None:
+                return await create_picker_response(
+                    self.repository, PickerKind.clients, [Replies.WRONG_CLIENT, Replies.SEARCH_CLIENT],
                 )
-            return await self._fix_and_next(step_number, message, user, scenario)
-        return await create_reply_keyboard_response(
-            messages=[Replies.CHOOSE_CLIENT],
-            buttons=client_list,
-            resize_keyboard=True,
+            return await self._fix_and_next(step_number, client.name, user, scenario)
+        return await create_picker_response(
+            self.repository, PickerKind.clients, [Replies.CHOOSE_CLIENT, Replies.SEARCH_CLIENT],
         )
 
     async def choose_work_type(
@@ -111,20 +107,13 @@ class WorkTimeReportScenario:
         step_number = 2
         await self._add_step(step_number, user, scenario)
         work_types = await self.repository.work_types.get_work_types()
-        work_list = [[work_type.name] for work_type in work_types]
         if message is not None:
             if message.strip() not in [work_type.name.strip() for work_type in work_types]:
-                return await create_reply_keyboard_response(
-                    messages=[Replies.WRONG_WORK_TYPE, Replies.CHOOSE_WORK_TYPE],
-                    buttons=work_list,
-                    resize_keyboard=True,
+                return await create_picker_response(
+                    self.repository, PickerKind.work_types, [Replies.WRONG_WORK_TYPE, Replies.CHOOSE_WORK_TYPE],
                 )
             return await self._fix_and_next(step_number, message, user, scenario)
-        return await create_reply_keyboard_response(
-            messages=[Replies.CHOOSE_WORK_TYPE],
-            buttons=work_list,
-            resize_keyboard=True,
-        )
+        return await create_picker_response(self.repository, PickerKind.work_types, [Replies.CHOOSE_WORK_TYPE])
 
     async def enter_date(
         self,
@@ -155,7 +144,7 @@ class WorkTimeReportScenario:
             if _step.number == step:
                 return scenario
         scenario.steps.append(ScenarioStep(number=step))
-        await self.repository.scenarios.upsert_user_scenario(user, scenario)
+        await self.repository.scenarios.upsert_user_scenario_step(user, scenario, step)
         return scenario
 
     async def _fix_and_next(
@@ -170,7 +159,7 @@ class WorkTimeReportScenario:
                 _step.result = result
                 break
         scenario.current_step = step + 1
-        await self.repository.scenarios.upsert_user_scenario(user, scenario)
+        await self.repository.scenarios.upsert_user_scenario_step(user, scenario, step)
         return await self.step_dispatcher[scenario.current_step](user, scenario)
 
     async def finish(self, user: User, scenario: Scenario, *args, **kwargs):
@@ -203,10 +192,8 @@ class WorkTimeReportScenario:
                 hours=hours,
                 comment=comment,
             )
-            result = await self.repository.google_repository.append_work_time_report(report)
+            await self.repository.work_time_reports.add_report(report)
             await self.repository.scenarios.del_user_scenario(user)
-            if not result:
-                raise Exception('Error while saving work time report')
             await self.notifier.notify(Notifications.SAVING_SUCCESS, user)
             return FinalResponse()
         except Exception as e:
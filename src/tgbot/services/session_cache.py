@@ -0,0 +1,56 @@
+from dataclasses import dataclass, asdict
+
+from cachetools import TTLCache
+
+from models import User
+
+
+@dataclass
+class SessionCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    dict = asdict
+
+
+class SessionCache:
+    """
+    Authenticated users by chat_id for a few seconds.
+
+    Sessions are dropped all at once when the handbook version changes, so
+    a user deactivated in the spreadsheet is re-validated on the next message.
+    A logout is broadcast over the handbook invalidation channel and drops the
+    session in every process, while the subscription is down the TTL bounds
+    how long another process may still serve it.
+    """
+
+    channel_prefix = 'session'
+
+    def __init__(self, ttl: float = 30, maxsize: int = 10000):
+        self.sessions: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.stats = SessionCacheStats()
+        self._version: int | None = None
+
+    def get(self, chat_id: int, version: int) -> User | None:
+        if version != self._version:
+            if self.sessions:
+                self.stats.invalidations += 1
+            self.sessions.clear()
+            self._version = version
+        user = self.sessions.get(chat_id)
+        if user is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return user
+
+    def set(self, chat_id: int, user: User, version: int) -> None:
+        if version == self._version:
+            self.sessions[chat_id] = user
+
+    def delete(self, chat_id: int) -> None:
+        self.sessions.pop(chat_id, None)
+
+    def on_invalidation(self, payload: str) -> None:
+        self.delete(int(payload))
@@ -0,0 +1,35 @@
+import re
+
+_a1_cell_re = re.compile(r'^([A-Z]+)(\d*)$')
+
+
+def column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def column_letters(index: int) -> str:
+    letters = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(ord('A') + rest) + letters
+    return letters
+
+
+def parse_a1_range(sheet_range: str) -> tuple[int, int, int, int | None]:
+    """
+    Parses `A2:E`, `B1:B1` or `B1` into zero-based (start_col, start_row, end_col, end_row),
+    end_row is None for open ranges.
+    """
+    start, _, end = sheet_range.upper().partition(':')
+    end = end or start
+    start_match = _a1_cell_re.match(start)
+    end_match = _a1_cell_re.match(end)
+    if not start_match or not end_match:
+        raise ValueError(f'Unsupported range: {sheet_range}')
+    start_row = int(start_match.group(2) or 1) - 1
+    end_row = int(end_match.group(2)) - 1 if end_match.group(2) else None
+    return column_index(start_match.group(1)), start_row, column_index(end_match.group(1)), end_row
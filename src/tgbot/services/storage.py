@@ -1,15 +1,84 @@
 import logging
-from typing import Any, cast
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, cast
 
 from aiogram.fsm.storage.redis import RedisStorage
+from redis.asyncio.client import Pipeline
+
+from .codecs import StorageCodec
 
 logger = logging.getLogger(__name__)
 
+# KEYS: hash ; ARGV: expire seconds (0 - keep the TTL), field, value, ...
+_SET_FIELDS_IF_EXISTS = """
+if redis.call('exists', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('hset', KEYS[1], unpack(ARGV, 2))
+if tonumber(ARGV[1]) > 0 then
+    redis.call('expire', KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+
+class StorageTransaction:
+    """Writes queued by `Storage.transaction`, sent together as one MULTI/EXEC."""
+
+    def __init__(self, storage: 'Storage', pipe: Pipeline):
+        self.storage = storage
+        self.pipe = pipe
+
+    async def set_data(
+        self,
+        keys: list[str],
+        data: dict[str, Any],
+        expired: int | None = None,
+    ) -> None:
+        redis_key = await self.storage.build_key(keys)
+        if data:
+            self.pipe.set(redis_key, self.storage.codec.encode(data), ex=expired)
+        else:
+            self.pipe.delete(redis_key)
+
+    async def del_keys(
+        self,
+        list_of_keys: list[list[str]],
+    ) -> None:
+        self.pipe.delete(*[await self.storage.build_key(k) for k in list_of_keys])
+
+    async def set_fields(
+        self,
+        keys: list[str],
+        fields: dict[str, Any],
+        expired: int | None = None,
+    ) -> None:
+        redis_key = await self.storage.build_key(keys)
+        self.pipe.hset(redis_key, mapping={k: self.storage.codec.encode(v) for k, v in fields.items()})
+        if expired:
+            self.pipe.expire(redis_key, expired)
+
+    async def add_to_set(
+        self,
+        keys: list[str],
+        *values: str | int,
+    ) -> None:
+        self.pipe.sadd(await self.storage.build_key(keys), *values)
+
+    async def remove_from_set(
+        self,
+        keys: list[str],
+        *values: str | int,
+    ) -> None:
+        self.pipe.srem(await self.storage.build_key(keys), *values)
+
 
 class Storage(RedisStorage):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, codec: StorageCodec | None = None, **kwargs):
         super().__init__(*args, **kwargs)
         self.key_separator = ':'
+        self.codec = codec or StorageCodec()
+        self._set_fields_if_exists = self.redis.register_script(_SET_FIELDS_IF_EXISTS)
 
     async def del_keys(
         self,
@@ -36,18 +105,197 @@ class Storage(RedisStorage):
             return
         await self.redis.set(
             redis_key,
-            self.json_dumps(data),
+            self.codec.encode(data),
             ex=expired,
         )
 
-    async def get_data(
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[StorageTransaction]:
+        """
+        Queues writes and sends them in one round trip as a MULTI/EXEC transaction
+        when the block exits, nothing is sent if the block raises.
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            yield StorageTransaction(self, pipe)
+            await pipe.execute()
+
+    async def set_many(
+        self,
+        items: list[tuple[list[str], dict[str, Any]] | tuple[list[str], dict[str, Any], int | None]],
+        expired: int | None = None,
+    ) -> None:
+        """
+        Sets all keys in one MULTI/EXEC transaction, readers never see a partial update.
+        An item may carry its own expiration as the third element.
+        """
+        async with self.transaction() as tr:
+            for keys, data, *item_expired in items:
+                await tr.set_data(keys, data, item_expired[0] if item_expired else expired)
+
+    async def set_fields(
+        self,
+        keys: list[str],
+        fields: dict[str, Any],
+        expired: int | None = None,
+    ) -> None:
+        """Sets hash fields and refreshes the key TTL in one transaction."""
+        async with self.transaction() as tr:
+            await tr.set_fields(keys, fields, expired)
+
+    async def set_fields_if_exists(
+        self,
+        keys: list[str],
+        fields: dict[str, Any],
+        expired: int | None = None,
+    ) -> bool:
+        """Like `set_fields` but atomically skips a hash that does not exist, False then."""
+        redis_key = await self.build_key(keys)
+        args = [expired or 0]
+        for k, v in fields.items():
+            args.extend([k, self.codec.encode(v)])
+        return bool(await self._set_fields_if_exists(keys=[redis_key], args=args))
+
+    async def get_fields(
         self,
         keys: list[str],
     ) -> dict[str, Any]:
+        redis_key = await self.build_key(keys)
+        values = await self.redis.hgetall(redis_key)
+        return {
+            (k.decode("utf-8") if isinstance(k, bytes) else k): self.codec.decode(v)
+            for k, v in values.items()
+        }
+
+    async def expire(
+        self,
+        keys: list[str],
+        expired: int,
+    ) -> bool:
+        """Extends the key TTL, False if the key does not exist."""
+        redis_key = await self.build_key(keys)
+        return bool(await self.redis.expire(redis_key, expired))
+
+    async def set_nx(
+        self,
+        keys: list[str],
+        data: dict[str, Any],
+        expired_ms: int,
+    ) -> bool:
+        redis_key = await self.build_key(keys)
+        result = await self.redis.set(
+            redis_key,
+            self.codec.encode(data),
+            px=expired_ms,
+            nx=True,
+        )
+        return bool(result)
+
+    async def add_to_set(
+        self,
+        keys: list[str],
+        *values: str | int,
+    ) -> None:
+        redis_key = await self.build_key(keys)
+        await self.redis.sadd(redis_key, *values)
+
+    async def remove_from_set(
+        self,
+        keys: list[str],
+        *values: str | int,
+    ) -> None:
+        redis_key = await self.build_key(keys)
+        await self.redis.srem(redis_key, *values)
+
+    async def get_set(
+        self,
+        keys: list[str],
+    ) -> set[str]:
+        redis_key = await self.build_key(keys)
+        values = await self.redis.smembers(redis_key)
+        return {v.decode("utf-8") if isinstance(v, bytes) else v for v in values}
+
+    async def scan_keys(
+        self,
+        prefix_keys: list[str],
+    ) -> list[str]:
+        """Keys starting with `prefix_keys` followed by the separator."""
+        pattern = await self.build_key([*prefix_keys, '*'])
+        return [
+            k.decode("utf-8") if isinstance(k, bytes) else k
+            async for k in self.redis.scan_iter(match=pattern, count=500)
+        ]
+
+    async def push_data(
+        self,
+        keys: list[str],
+        data: dict[str, Any],
+    ) -> None:
+        redis_key = await self.build_key(keys)
+        await self.redis.lpush(redis_key, self.codec.encode(data))
+
+    async def move_data(
+        self,
+        source_keys: list[str],
+        destination_keys: list[str],
+        timeout: int | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Moves the oldest pushed item from one list to another,
+        waits up to `timeout` seconds if `timeout` is set.
+        """
+        source = await self.build_key(source_keys)
+        destination = await self.build_key(destination_keys)
+        if timeout is None:
+            value = await self.redis.rpoplpush(source, destination)
+        else:
+            value = await self.redis.brpoplpush(source, destination, timeout=timeout)
+        if value is None:
+            return None
+        return self.decode_data(value)
+
+    async def get_list_data(
+        self,
+        keys: list[str],
+    ) -> list[dict[str, Any]]:
+        """Returns list items from the oldest pushed to the newest."""
+        redis_key = await self.build_key(keys)
+        values = await self.redis.lrange(redis_key, 0, -1)
+        return [self.decode_data(v) for v in reversed(values)]
+
+    async def get_raw_data(
+        self,
+        keys: list[str],
+    ) -> bytes | str | None:
+        _key = await self.build_key(keys)
+        return await self.redis.get(_key)
+
+    async def get_raw_data_with_ttl(
+        self,
+        keys: list[str],
+    ) -> tuple[bytes | str | None, int | None]:
+        """The raw value and its remaining TTL in milliseconds, None if the key does not expire."""
         _key = await self.build_key(keys)
-        value = await self.redis.get(_key)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            value, ttl_ms = await pipe.get(_key).pttl(_key).execute()
+        return value, ttl_ms if ttl_ms >= 0 else None
+
+    def decode_data(self, value: bytes | str) -> dict[str, Any]:
+        return cast(dict[str, Any], self.codec.decode(value))
+
+    async def get_data(
+        self,
+        keys: list[str],
+    ) -> dict[str, Any]:
+        value = await self.get_raw_data(keys)
         if value is None:
             return {}
-        if isinstance(value, bytes):
-            value = value.decode("utf-8")
-        return cast(dict[str, Any], self.json_loads(value))
+        return self.decode_data(value)
+
+    async def get_many(
+        self,
+        list_of_keys: list[list[str]],
+    ) -> list[dict[str, Any]]:
+        """Reads all keys with one MGET, a missing key gives an empty dict."""
+        keys = [await self.build_key(k) for k in list_of_keys]
+        values = await self.redis.mget(keys)
+        return [{} if v is None else self.decode_data(v) for v in values]
@@ -1,5 +1,7 @@
 import logging
 
+from aiogram.filters.callback_data import CallbackData
+
 from models import InlineKeyboardResponse, InlineButton
 from models import ReplyCalendarResponse
 from models import Response, ResponseType, ReplyKeyboardResponse, TextMessagesResponse
@@ -7,6 +9,10 @@ from models import Response, ResponseType, ReplyKeyboardResponse, TextMessagesRe
 logger = logging.getLogger(__name__)
 
 
+class AnswerCallback(CallbackData, prefix='answer'):
+    text: str
+
+
 async def create_inline_keyboard_response(
     messages: list[str],
     buttons: list[list[tuple[str, str]]],
@@ -0,0 +1,89 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+from models import WorkTimeReport, WorkTimeReportStat
+
+DATE_FORMAT = '%d.%m.%Y'
+
+
+def parse_date(value: str | None) -> date | None:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip(), DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+def parse_duration(value: str | None) -> int | None:
+    """Parses `HH:MM` or `HH:MM:SS` into seconds."""
+    if not value:
+        return None
+    parts = value.strip().split(':')
+    if len(parts) not in (2, 3):
+        return None
+    try:
+        hours, minutes, seconds = (int(p) for p in parts + ['0'] * (3 - len(parts)))
+    except ValueError:
+        return None
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def format_duration(seconds: int) -> str:
+    sign = '-' if seconds < 0 else ''
+    seconds = abs(seconds)
+    return f'{sign}{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+
+
+def work_plan_seconds(date_from: date, date_to: date, day_hours: float = 8) -> int:
+    """Working time plan for the period: `day_hours` for every weekday, bounds included."""
+    if date_to < date_from:
+        return 0
+    days = (date_to - date_from).days + 1
+    weeks, rest = divmod(days, 7)
+    workdays = weeks * 5
+    for i in range(rest):
+        if (date_from + timedelta(days=weeks * 7 + i)).weekday() < 5:
+            workdays += 1
+    return int(workdays * day_hours * 3600)
+
+
+def query_work_time_reports(
+    reports: Iterable[WorkTimeReport],
+    report_from_date: str | None = None,
+    report_to_date: str | None = None,
+    client: str | None = None,
+    user_id: str | None = None,
+) -> tuple[list[WorkTimeReport], WorkTimeReportStat]:
+    """
+    Filters reports the way the "Отчеты для бота" sheet does. Only the fact total
+    (the sum of the matched hours) is computed, plan and net come from the
+    sheet formulas and are left unavailable.
+    """
+    date_from = parse_date(report_from_date)
+    date_to = parse_date(report_to_date)
+    user_id = (user_id or '').strip()
+    client = (client or '').strip()
+    matched = []
+    fact = 0
+    for report in reports:
+        if report.removed:
+            continue
+        report_date = parse_date(report.report_date)
+        if date_from and (report_date is None or report_date < date_from):
+            continue
+        if date_to and (report_date is None or report_date > date_to):
+            continue
+        if user_id and report.user_id.strip() != user_id:
+            continue
+        if client and report.client.strip() != client:
+            continue
+        matched.append(report)
+        fact += parse_duration(report.hours) or 0
+
+    return matched, WorkTimeReportStat(
+        report_from_date='' if report_from_date is None else report_from_date,
+        report_to_date='' if report_to_date is None else report_to_date,
+        time_fact=format_duration(fact),
+        plan_available=False,
+    )
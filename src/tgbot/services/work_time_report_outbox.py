@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, asdict
+
+from models import WorkTimeReport
+
+from .constants import RedisKeys
+from .google_sheets_resilience import track_sheets_calls
+from .redis_lock import LockLostError, LockTimeoutError, RedisLock, RedisLockHandle
+from .repostiories.google_repository import GoogleRepository
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboxStats:
+    enqueued: int = 0
+    flushes: int = 0
+    flushed_reports: int = 0
+    failed_flushes: int = 0
+    dead_lettered_reports: int = 0
+
+    dict = asdict
+
+
+class WorkTimeReportOutbox:
+    """
+    Write-behind queue for new work time reports.
+
+    Reports are pushed to a Redis list and confirmed right away. A single flusher
+    (the holder of a RedisLock, so any number of bot processes can run it)
+    moves them to a processing list, waits `flush_window` seconds for more reports
+    and appends the whole batch with one Sheets call. The appended range gives
+    the row ids of the batch, they go to the report mirror.
+
+    The processing list is kept until the append succeeds. A batch is resent only
+    if the failed append surely had no effect (a 4xx or a connection that was never
+    made). After a 5xx, a timeout or a crash during the append the rows may be in
+    the sheet, so the batch goes to a dead letter list for a manual check instead
+    of being duplicated. The lock fence is checked before the append and before
+    the processing list is dropped, a flusher that lost its lease backs off.
+    """
+
+    _outbox_key = RedisKeys.WORK_TIME_REPORT_OUTBOX_KEY
+    _lock_key = RedisKeys.WORK_TIME_REPORT_OUTBOX_LOCK_KEY
+
+    def __init__(
+        self,
+        storage: Storage,
+        google_repository: GoogleRepository,
+        flush_window: float = 2,
+        batch_size: int = 200,
+        lease_seconds: int = 30,
+        retry_delay: float = 5,
+    ):
+        self.storage = storage
+        self.google_repository = google_repository
+        self.flush_window = flush_window
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+        self.stats = OutboxStats()
+        self.lock = RedisLock(storage, self._lock_key, lease_ms=lease_seconds * 1000)
+        self._processing_keys = [self._outbox_key, 'processing']
+        # set while the processing batch is being appended
+        self._attempt_keys = [self._outbox_key, 'attempt']
+        self._dead_letter_keys = [self._outbox_key, 'dead_letter']
+
+    async def enqueue(self, report: WorkTimeReport) -> str:
+        report_id = uuid.uuid4().hex
+        await self.storage.push_data(
+            keys=[self._outbox_key],
+            data={'id': report_id, 'report': report.dict()},
+        )
+        self.stats.enqueued += 1
+        return report_id
+
+    async def run(self):
+        while True:
+            try:
+                async with self.lock(timeout=self.lease_seconds) as lease:
+                    await self._flush(lease)
+            except asyncio.CancelledError:
+                raise
+            except LockTimeoutError:
+                # another process is flushing
+                continue
+            except LockLostError:
+                logger.warning('Work time report outbox lease lost, flush abandoned')
+            except Exception as exc:
+                logger.exception(exc)
+                await asyncio.sleep(self.retry_delay)
+
+    async def _flush(self, lease: RedisLockHandle):
+        # leftovers of a failed or interrupted flush go first
+        entries = await self.storage.get_list_data(keys=self._processing_keys)
+        if entries and await self.storage.get_data(keys=self._attempt_keys):
+            # interrupted during the append, the rows may be in the sheet
+            await self._dead_letter(lease, len(entries))
+            return
+        if not entries:
+            first = await self.storage.move_data([self._outbox_key], self._processing_keys, timeout=1)
+            if first is None:
+                return
+            await asyncio.sleep(self.flush_window)
+            for _ in range(self.batch_size - 1):
+                if await self.storage.move_data([self._outbox_key], self._processing_keys) is None:
+                    break
+            entries = await self.storage.get_list_data(keys=self._processing_keys)
+
+        reports = [WorkTimeReport(**entry['report']) for entry in entries]
+        await lease.check()
+        await self.storage.set_data(keys=self._attempt_keys, data={'reports': len(reports)})
+        with track_sheets_calls() as outcome:
+            first_row_id = await self.google_repository.append_work_time_reports(reports)
+        if first_row_id is False:
+            self.stats.failed_flushes += 1
+            if not outcome.not_applied:
+                logger.warning(f'Append of {len(reports)} work time reports failed with {outcome.error}, '
+                               f'the rows may be in the sheet')
+                await self._dead_letter(lease, len(reports))
+                return
+            await self.storage.del_keys([self._attempt_keys])
+            logger.warning(f'Can`t append {len(reports)} work time reports, retry in {self.retry_delay}s')
+            await asyncio.sleep(self.retry_delay)
+            return
+
+        await lease.check()
+        await self.storage.del_keys([self._processing_keys, self._attempt_keys])
+        self.stats.flushes += 1
+        self.stats.flushed_reports += len(entries)
+        logger.info(f'{len(entries)} work time reports appended from row {first_row_id}')
+
+    async def _dead_letter(self, lease: RedisLockHandle, count: int):
+        await lease.check()
+        while await self.storage.move_data(self._processing_keys, self._dead_letter_keys) is not None:
+            pass
+        await self.storage.del_keys([self._attempt_keys])
+        self.stats.dead_lettered_reports += count
+        logger.error(f'{count} work time reports moved to the dead letter list, check the sheet before resending')
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+
+from .constants import RedisKeys
+from .google_sheets_scheduler import background_priority
+from .repostiories.google_repository import GoogleRepository
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WorkTimeReportSyncStats:
+    syncs: int = 0
+    full_syncs: int = 0
+    skipped: int = 0
+    appended_rows: int = 0
+    changed_flags: int = 0
+    failures: int = 0
+    last_duration: float = 0
+
+    dict = asdict
+
+
+class WorkTimeReportSync:
+    """
+    Keeps the mirror of the reports sheet up to date. The sheet only grows and removal
+    is a flag, so a tick reads the rows after the cursor and the row id and removed
+    columns instead of the whole sheet. Every `full_interval` seconds the mirror is
+    reloaded to pick up manual edits of older rows.
+
+    Ticks are shared between processes, the first one to take the tick key syncs.
+    """
+
+    _sync_key = RedisKeys.WORK_TIME_REPORT_MIRROR_SYNC_KEY
+
+    def __init__(
+        self,
+        storage: Storage,
+        google_repository: GoogleRepository,
+        interval: float = 10,
+        full_interval: float = 3600,
+    ):
+        self.storage = storage
+        self.google_repository = google_repository
+        self.interval = interval
+        self.full_interval = full_interval
+        self.stats = WorkTimeReportSyncStats()
+
+    async def run(self):
+        next_full_sync = time.monotonic() + self.full_interval
+        # a task of its own, the priority does not leak to interactive calls
+        with background_priority():
+            while True:
+                await asyncio.sleep(self.interval)
+                started = time.monotonic()
+                try:
+                    if not await self.storage.set_nx([self._sync_key], {'at': time.time()}, int(self.interval * 1000)):
+                        self.stats.skipped += 1
+                        continue
+                    if self.full_interval and started >= next_full_sync:
+                        await self.google_repository.update_work_time_report_mirror()
+                        next_full_sync = started + self.full_interval
+                        self.stats.full_syncs += 1
+                    else:
+                        appended, changed = await self.google_repository.sync_work_time_report_mirror()
+                        self.stats.syncs += 1
+                        self.stats.appended_rows += appended
+                        self.stats.changed_flags += changed
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    self.stats.failures += 1
+                    logger.exception(exc)
+                    continue
+                self.stats.last_duration = time.monotonic() - started